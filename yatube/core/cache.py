@@ -0,0 +1,310 @@
+import hashlib
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+from .compression import precompress
+from .holes import fill, precompress as precompress_holes
+
+MISSING = object()
+
+LOCK_SUFFIX = ':lock'
+
+# Как и у LocMemCache, хранилище общее для всех потоков процесса:
+# django.core.cache.caches создаёт по экземпляру бэкенда на поток.
+_local_caches = {}
+_local_caches_lock = threading.Lock()
+
+
+class LocalLRU:
+    """Маленький LRU-кэш процесса с коротким временем жизни записей."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=None):
+        if timeout is not None and timeout <= 0:
+            self.delete(key)
+            return
+        ttl = self.timeout if timeout is None else min(timeout, self.timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache(BaseCache):
+    """Локальный LRU процесса перед общим кэшем всех воркеров.
+
+    Горячие ключи читаются из памяти процесса, промахи идут в общий
+    бэкенд (OPTIONS['SHARED'] -- алиас из CACHES). Записи в LRU живут
+    не дольше LOCAL_TIMEOUT секунд, поэтому изменения, сделанные
+    другими воркерами, становятся видны с этой задержкой.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        with _local_caches_lock:
+            if location not in _local_caches:
+                _local_caches[location] = LocalLRU(
+                    options.get('LOCAL_MAX_ENTRIES', 256),
+                    options.get('LOCAL_TIMEOUT', 5),
+                )
+            self.local = _local_caches[location]
+
+    @cached_property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def local_key(self, key, version=None):
+        return self.shared.make_key(key, version=version)
+
+    def local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return None
+        return timeout
+
+    def get(self, key, default=None, version=None):
+        local_key = self.local_key(key, version)
+        value = self.local.get(local_key)
+        if value is not MISSING:
+            return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self.local.set(local_key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(
+            self.local_key(key, version), value, self.local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(
+                self.local_key(key, version), value,
+                self.local_timeout(timeout),
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.local_key(key, version))
+        self.shared.delete(key, version=version)
+
+    def clear_local(self):
+        """Забывает LRU процесса: следующие чтения идут в общий кэш."""
+        self.local.clear()
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(self.local_key(key, version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self.local.set(self.local_key(key, version), value)
+            found.update(fetched)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            self.local.set(
+                self.local_key(key, version), value,
+                self.local_timeout(timeout),
+            )
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self.local_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.local_key(key, version)) is not MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+class Uncacheable(Exception):
+    """Результат вычисления нельзя класть в кэш; его отдают как есть."""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+
+
+def recompute(cache, key, compute, timeout, stale_timeout, version):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    if timeout is None:
+        cache.set(key, (value, delta, None), None, version=version)
+    else:
+        cache.set(
+            key,
+            (value, delta, time.time() + timeout),
+            timeout + stale_timeout,
+            version=version,
+        )
+    return value
+
+
+def get_or_compute(cache, key, compute, timeout=DEFAULT_TIMEOUT,
+                   stale_timeout=0, beta=1.0, version=None,
+                   lock_timeout=30, poll_interval=0.05):
+    """Берёт значение из кэша или вычисляет его ровно в одном воркере.
+
+    В кэше лежит тройка (значение, время вычисления, срок годности).
+    Незадолго до истечения срока запрос с вероятностью, растущей
+    с приближением срока и временем вычисления, обновляет значение
+    заранее (XFetch, beta регулирует агрессивность). Ещё stale_timeout
+    секунд после срока значение отдаётся устаревшим, пока его
+    пересчитывает владелец блокировки `<key>:lock`.
+
+    Если значения нет совсем, остальные воркеры ждут владельца
+    блокировки, но не дольше lock_timeout: после этого считают сами.
+    Значения, записанные этой функцией, читаются только ею же.
+    """
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    lock_key = key + LOCK_SUFFIX
+    entry = cache.get(key, version=version)
+    if entry is not None:
+        value, delta, expires = entry
+        gap = delta * beta * math.log(1.0 - random.random())
+        if expires is None or time.time() - gap < expires:
+            return value
+    if cache.add(lock_key, 1, lock_timeout, version=version):
+        try:
+            return recompute(
+                cache, key, compute, timeout, stale_timeout, version)
+        finally:
+            cache.delete(lock_key, version=version)
+    if entry is not None:
+        return entry[0]
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        entry = cache.get(key, version=version)
+        if entry is not None:
+            return entry[0]
+        if not cache.has_key(lock_key, version=version):
+            break
+    return recompute(cache, key, compute, timeout, stale_timeout, version)
+
+
+def render_for_cache(view, request, args, kwargs, holes):
+    """Ответ view для cache_view; неуспешные ответы не кэшируются."""
+    request.punching_holes = holes
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+    finally:
+        request.punching_holes = False
+    if response.status_code != 200 or response.streaming:
+        raise Uncacheable(response)
+    if holes:
+        return precompress_holes(response)
+    return precompress(response)
+
+
+def cache_view(timeout, stale_timeout=0, key_prefix='view', holes=False,
+               vary_on=None):
+    """Аналог cache_page с защитой от одновременного пересчёта.
+
+    Кэшируются только успешные GET/HEAD-ответы; ключ учитывает
+    хост, полный путь и пользователя, для которого строилась страница.
+    Вместе с ответом кэшируются его сжатые тела (core.compression).
+
+    С holes=True страница строится одна на всех, а фрагменты
+    пользователя ({% hole %}) подставляются в неё при каждом ответе
+    (core.holes); gzip-тело собирается из заранее сжатых кусков
+    страницы и сжатых на лету фрагментов. vary_on(request, *args,
+    **kwargs) возвращает версии данных страницы, которые добавляются
+    к ключу.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            parts = [
+                key_prefix,
+                hashlib.md5(
+                    request.build_absolute_uri().encode()).hexdigest(),
+                'all' if holes else request.user.pk or 'anon',
+            ]
+            if vary_on is not None:
+                parts.extend(vary_on(request, *args, **kwargs))
+            try:
+                response = get_or_compute(
+                    caches['default'], ':'.join(map(str, parts)),
+                    lambda: render_for_cache(
+                        view, request, args, kwargs, holes),
+                    timeout=timeout, stale_timeout=stale_timeout,
+                )
+            except Uncacheable as error:
+                response = error.value
+            if holes:
+                response = fill(request, response)
+            return response
+        return wrapper
+    return decorator
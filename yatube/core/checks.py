@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+MIN_CACHE_ENTRIES = 1000
+
+
+def is_production():
+    return getattr(settings, 'YATUBE_ENV', 'dev') == 'prod'
+
+
+@register(Tags.compatibility)
+def check_debug(app_configs, **kwargs):
+    if settings.DEBUG and is_production():
+        return [Warning(
+            'DEBUG is on in the prod profile.',
+            hint='Every SQL query is kept in connection.queries. '
+                 'Unset DEBUG.',
+            id='core.W001',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_cache_size(app_configs, **kwargs):
+    errors = []
+    for alias, config in settings.CACHES.items():
+        if config['BACKEND'] != LOCMEM_CACHE:
+            continue
+        max_entries = config.get('OPTIONS', {}).get('MAX_ENTRIES', 300)
+        if max_entries < MIN_CACHE_ENTRIES:
+            errors.append(Warning(
+                f'Cache {alias!r} keeps only {max_entries} entries.',
+                hint='Page and fragment caches evict each other. '
+                     'Raise OPTIONS["MAX_ENTRIES"].',
+                id='core.W002',
+            ))
+    return errors
+
+
+@register(Tags.templates)
+def check_template_loaders(app_configs, **kwargs):
+    errors = []
+    for config in settings.TEMPLATES:
+        loaders = config.get('OPTIONS', {}).get('loaders')
+        if loaders is None:
+            cached = not settings.DEBUG
+        else:
+            cached = any(
+                isinstance(loader, (list, tuple))
+                and loader[0] == CACHED_LOADER
+                for loader in loaders
+            )
+        if is_production() and not cached:
+            errors.append(Warning(
+                'Templates are not cached.',
+                hint=f'Wrap the loaders in {CACHED_LOADER}.',
+                id='core.W003',
+            ))
+    return errors
+
+
+@register()
+def check_persistent_connections(app_configs, **kwargs):
+    errors = []
+    for alias, config in settings.DATABASES.items():
+        if is_production() and not config.get('CONN_MAX_AGE'):
+            errors.append(Warning(
+                f'Database {alias!r} opens a connection per request.',
+                hint='Set CONN_MAX_AGE to reuse connections.',
+                id='core.W004',
+            ))
+    return errors
+
+
+@register()
+def check_query_logging(app_configs, **kwargs):
+    level = (
+        settings.LOGGING.get('loggers', {})
+        .get('django.db.backends', {})
+        .get('level')
+    )
+    if settings.DEBUG and level == 'DEBUG':
+        return [Warning(
+            'Every SQL query is logged.',
+            hint='Raise the django.db.backends log level.',
+            id='core.W005',
+        )]
+    return []
@@ -0,0 +1,135 @@
+import gzip
+import struct
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+# Порядок предпочтения: brotli сжимает текст лучше gzip.
+PREFERRED = ('br', 'gzip')
+
+# Заголовок gzip без имени и времени и пустой последний блок deflate.
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+FINAL_BLOCK = zlib.compressobj(wbits=-zlib.MAX_WBITS).flush()
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        key, _, value = params.partition('=')
+        try:
+            quality = float(value) if key.strip() == 'q' else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def available_encodings():
+    return PREFERRED if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, best=False):
+    """Сжимает тело ответа; best -- максимальная степень для кэша."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, 9 if best else 6, mtime=0)
+
+
+def deflate_blocks(parts, level=6):
+    """Сжимает куски в независимые блоки deflate.
+
+    Z_FULL_FLUSH после каждого куска сбрасывает словарь, так что блоки
+    не ссылаются друг на друга и их можно склеивать с другими такими же
+    блоками в любом порядке (gzip_join).
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return [
+        compressor.compress(part) + compressor.flush(zlib.Z_FULL_FLUSH)
+        for part in parts
+    ]
+
+
+def gzip_join(blocks, data):
+    """gzip-поток из блоков deflate_blocks; data -- всё несжатое тело."""
+    return b''.join((
+        GZIP_HEADER, *blocks, FINAL_BLOCK,
+        struct.pack('<II', zlib.crc32(data), len(data) & 0xffffffff),
+    ))
+
+
+def compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and response.status_code == 200
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+        and len(response.content) >= settings.COMPRESSION_MIN_LENGTH
+    )
+
+
+def precompress(response):
+    """Сжимает тело ответа, который кладут в кэш, во всех кодировках.
+
+    Сжатые тела хранятся в атрибуте compressed вместе с ответом, и
+    CompressionMiddleware отдаёт их из кэша без повторного сжатия.
+    Сжатая копия, не ставшая меньше, не сохраняется.
+    """
+    if not compressible(response):
+        return response
+    response.compressed = {}
+    for encoding in available_encodings():
+        body = compress(response.content, encoding, best=True)
+        if len(body) < len(response.content):
+            response.compressed[encoding] = body
+    return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает текстовые ответы в brotli или gzip по Accept-Encoding.
+
+    Для ответов из cache_view берёт тела, сжатые один раз перед
+    записью в кэш. Маленькие (меньше COMPRESSION_MIN_LENGTH байт) и
+    уже сжатые ответы, а также потоковые, отдаются как есть.
+    """
+
+    def process_response(self, request, response):
+        if not compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        bodies = getattr(response, 'compressed', {})
+        candidates = [encoding for encoding in available_encodings()
+                      if encoding in accepted]
+        if not candidates:
+            return response
+        # Готовое сжатое тело лучше, чем сжатие на каждый запрос.
+        encoding = next(
+            (encoding for encoding in candidates if encoding in bodies),
+            candidates[0],
+        )
+        if encoding in bodies:
+            body = bodies[encoding]
+        else:
+            body = compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .compression import compressible, deflate_blocks, gzip_join
+
+HOLE_RE = re.compile(r'<!--hole:(\w+):([\w=-]*)-->')
+VERSION_KEY = 'hole:version:{}'
+
+_renderers = {}
+
+
+def hole(name, cached=True):
+    """Регистрирует функцию, которая рисует дырку name для запроса.
+
+    Функция получает request и аргументы тега {% hole %} и возвращает
+    HTML. Если cached, результат кэшируется на HOLE_TIMEOUT секунд
+    отдельно для каждого пользователя; фрагменты с CSRF-токеном
+    кэшировать нельзя.
+    """
+    def decorator(render):
+        _renderers[name] = (render, cached)
+        return render
+    return decorator
+
+
+def marker(name, args):
+    payload = base64.urlsafe_b64encode(json.dumps(args).encode()).decode()
+    return f'<!--hole:{name}:{payload}-->'
+
+
+def user_version(request):
+    """Версия фрагментов пользователя; одно чтение кэша на запрос."""
+    version = getattr(request, '_hole_version', None)
+    if version is None:
+        if request.user.is_authenticated:
+            version = cache.get_or_set(
+                VERSION_KEY.format(request.user.pk), uuid.uuid4().hex,
+                timeout=None)
+        else:
+            version = 'anon'
+        request._hole_version = version
+    return version
+
+
+def invalidate_user(user_id):
+    """Сбрасывает все закэшированные фрагменты пользователя."""
+    cache.set(VERSION_KEY.format(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def render_hole(request, name, args):
+    render, cached = _renderers[name]
+    if not cached:
+        return render(request, *args)
+    key = 'hole:{}:{}:{}:{}'.format(
+        name, request.user.pk or 'anon', user_version(request),
+        hashlib.md5(json.dumps(args).encode()).hexdigest())
+    html = cache.get(key)
+    if html is None:
+        html = render(request, *args)
+        cache.set(key, html, settings.HOLE_TIMEOUT)
+    return html
+
+
+def precompress(response):
+    """Сжимает неизменную часть страницы с дырками перед записью в кэш.
+
+    Куски между метками сжимаются в независимые блоки deflate
+    (атрибут segments); fill досжимает только фрагменты пользователя
+    и склеивает из блоков gzip-тело без сжатия всей страницы.
+    """
+    response.compressed = {}
+    if compressible(response):
+        parts = HOLE_RE.split(response.content.decode(response.charset))
+        response.segments = deflate_blocks(
+            [part.encode(response.charset) for part in parts[::3]], level=9)
+    return response
+
+
+def fill(request, response):
+    """Подставляет в общую для всех страницу фрагменты пользователя.
+
+    Если неизменная часть сжата заранее (precompress), gzip-тело
+    собирается из её блоков и сжатых фрагментов.
+    """
+    if response.streaming:
+        return response
+    content = response.content.decode(response.charset)
+    rendered = {}
+    fragments = []
+
+    def replace(match):
+        if match.group(0) not in rendered:
+            args = json.loads(base64.urlsafe_b64decode(match.group(2)))
+            rendered[match.group(0)] = render_hole(
+                request, match.group(1), args)
+        fragments.append(rendered[match.group(0)])
+        return rendered[match.group(0)]
+
+    filled = HOLE_RE.sub(replace, content)
+    if rendered:
+        response.content = filled
+    segments = getattr(response, 'segments', None)
+    if segments is not None and len(segments) == len(fragments) + 1:
+        inserted = deflate_blocks(
+            [fragment.encode(response.charset) for fragment in fragments])
+        blocks = [segments[0]]
+        for fragment, segment in zip(inserted, segments[1:]):
+            blocks += [fragment, segment]
+        response.compressed = {
+            'gzip': gzip_join(blocks, response.content)}
+    return response
+
+
+@hole('header')
+def header(request, view_name):
+    return render_to_string(
+        'includes/header_user.html', {'view_name': view_name},
+        request=request)
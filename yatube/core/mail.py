@@ -0,0 +1,122 @@
+import copy
+import logging
+import os
+import pickle
+import smtplib
+import socket
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.pickle'
+FAILED_DIR = 'failed'
+# Сбой соединения, а не письма: письмо остаётся в очереди.
+DISCONNECTED = (smtplib.SMTPServerDisconnected, ConnectionError,
+                socket.timeout)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Складывает письма в каталог-очередь вместо отправки.
+
+    Запрос (например, сброс пароля) завершается сразу, а письма
+    отправляет команда send_queued_mail через EMAIL_QUEUE_BACKEND.
+    """
+
+    def __init__(self, queue_dir=None, **kwargs):
+        super().__init__(**kwargs)
+        self.queue_dir = queue_dir or settings.EMAIL_QUEUE_DIR
+
+    def send_messages(self, email_messages):
+        os.makedirs(self.queue_dir, exist_ok=True)
+        sent = 0
+        for message in email_messages:
+            try:
+                enqueue(self.queue_dir, message)
+            except OSError:
+                if not self.fail_silently:
+                    raise
+            else:
+                sent += 1
+        return sent
+
+
+def enqueue(queue_dir, message):
+    message = copy.copy(message)
+    message.connection = None
+    name = '{}-{}'.format(time_key(), uuid.uuid4().hex)
+    temp_path = os.path.join(queue_dir, '.' + name)
+    with open(temp_path, 'wb') as file:
+        pickle.dump(message, file, pickle.HIGHEST_PROTOCOL)
+    # Переименование атомарно: воркер не увидит недописанный файл.
+    os.replace(temp_path, os.path.join(queue_dir, name + SUFFIX))
+
+
+def time_key():
+    return '{:020d}'.format(time.time_ns())
+
+
+def queued_paths(queue_dir):
+    try:
+        names = sorted(os.listdir(queue_dir))
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(queue_dir, name) for name in names
+        if name.endswith(SUFFIX) and not name.startswith('.')
+    ]
+
+
+def move_to_failed(queue_dir, path):
+    """Убирает письмо из очереди в failed/, чтобы оно её не держало."""
+    failed_dir = os.path.join(queue_dir, FAILED_DIR)
+    os.makedirs(failed_dir, exist_ok=True)
+    os.replace(path, os.path.join(failed_dir, os.path.basename(path)))
+
+
+def drain(queue_dir=None, connection=None):
+    """Отправляет очередь по одному письму через одно соединение.
+
+    Возвращает число отправленных писем. Файл удаляется сразу после
+    отправки, так что при сбое посреди очереди отправленное не уйдёт
+    повторно. Файлы, которые не читаются или отвергнуты сервером,
+    переносятся в failed/. Если соединение разорвано, остаток очереди
+    ждёт следующего прохода; ошибка открытия соединения пробрасывается.
+    """
+    queue_dir = queue_dir or settings.EMAIL_QUEUE_DIR
+    paths = queued_paths(queue_dir)
+    if not paths:
+        return 0
+    connection = connection or get_connection(settings.EMAIL_QUEUE_BACKEND)
+    sent = 0
+    connection.open()
+    try:
+        for path in paths:
+            try:
+                with open(path, 'rb') as file:
+                    message = pickle.load(file)
+            except Exception:
+                logger.exception('Failed to load queued email %s', path)
+                move_to_failed(queue_dir, path)
+                continue
+            try:
+                delivered = connection.send_messages([message])
+            except DISCONNECTED:
+                logger.exception('Mail connection lost, the rest of the '
+                                 'queue waits for the next pass')
+                break
+            except Exception:
+                logger.exception('Failed to send queued email %s', path)
+                delivered = 0
+            if delivered:
+                os.remove(path)
+                sent += 1
+            else:
+                move_to_failed(queue_dir, path)
+    finally:
+        connection.close()
+    return sent
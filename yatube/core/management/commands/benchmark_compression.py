@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.test import Client, RequestFactory
+
+from core.compression import CompressionMiddleware, precompress
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность сжатия страницы на каждый '
+            'запрос (GZipMiddleware) и отдачи сжатого тела из кэша')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--runs', type=int, default=500)
+
+    def handle(self, *args, **options):
+        page = Client().get(options['url'])
+        if page.status_code != 200:
+            raise CommandError('{} ответил {}'.format(
+                options['url'], page.status_code))
+        body = page.content
+        cached = precompress(HttpResponse(body))
+        request = RequestFactory().get(
+            options['url'], HTTP_ACCEPT_ENCODING='gzip, br')
+
+        def gzip_per_request():
+            return GZipMiddleware().process_response(
+                request, HttpResponse(body))
+
+        def cached_body():
+            response = HttpResponse(body)
+            response.compressed = cached.compressed
+            return CompressionMiddleware().process_response(
+                request, response)
+
+        self.stdout.write(f'Страница: {len(body)} байт')
+        for label, respond in (('gzip на запрос', gzip_per_request),
+                               ('из кэша', cached_body)):
+            response = respond()
+            started = time.perf_counter()
+            for _ in range(options['runs']):
+                respond()
+            elapsed = time.perf_counter() - started
+            self.stdout.write('{}: {:.0f} ответов/с, {} {} байт'.format(
+                label, options['runs'] / elapsed,
+                response.get('Content-Encoding', 'identity'),
+                len(response.content)))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Template, engines
+from django.template.loader import get_template
+
+# Прежний вариант include: ссылка на каждую страницу.
+FULL_RANGE = Template('''
+{% for i in page_obj.paginator.page_range %}
+  {% if page_obj.number == i %}
+    <li class="page-item active"><span class="page-link">{{ i }}</span></li>
+  {% else %}
+    <li class="page-item">
+      <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+    </li>
+  {% endif %}
+{% endfor %}
+''', engine=engines['django'].engine)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает отрисовку пагинатора со всеми и с окном страниц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5000)
+        parser.add_argument('--runs', type=int, default=20)
+
+    def handle(self, *args, **options):
+        paginator = Paginator(range(options['pages'] * 10), 10)
+        page_obj = paginator.page(options['pages'] // 2)
+        elided = get_template('posts/includes/paginator.html')
+        for label, render in (
+            ('full', lambda: FULL_RANGE.render(
+                Context({'page_obj': page_obj}))),
+            ('elided', lambda: elided.render({'page_obj': page_obj})),
+        ):
+            html = render()
+            started = time.perf_counter()
+            for _ in range(options['runs']):
+                render()
+            elapsed = (time.perf_counter() - started) / options['runs']
+            self.stdout.write('{}: {:.2f} ms, {} KB'.format(
+                label, elapsed * 1000, len(html.encode()) // 1024))
@@ -0,0 +1,36 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.ratelimit import ratelimit
+
+
+@ratelimit('benchmark', '1000000/s')
+def view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет накладные расходы ratelimit на один запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().post('/')
+        request.user = AnonymousUser()
+        runs = options['runs']
+        results = {}
+        for label, target in (('bare', view.__wrapped__), ('limited', view)):
+            cache.clear()
+            started = time.perf_counter()
+            for _ in range(runs):
+                target(request)
+            results[label] = (time.perf_counter() - started) / runs
+        overhead = results['limited'] - results['bare']
+        self.stdout.write('overhead per request: {:.1f} µs'.format(
+            overhead * 1e6))
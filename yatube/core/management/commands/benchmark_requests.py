@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+AUTH_BACKENDS = {
+    'model': 'django.contrib.auth.backends.ModelBackend',
+    'cached': 'users.backends.CachedModelBackend',
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку и число SQL-запросов на страницу '
+            'для разных хранилищ сессий и бэкендов авторизации')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/follow/')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--runs', type=int, default=50)
+
+    def measure(self, user, url, runs):
+        client = Client()
+        client.force_login(user)
+        client.get(url)
+        timings = []
+        queries = 0
+        for _ in range(runs):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                client.get(url)
+            timings.append(time.perf_counter() - started)
+            queries += len(captured)
+        return statistics.median(timings), queries / runs
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Нет пользователя {}'.format(
+                options['username']))
+        for session_name, engine in SESSION_ENGINES.items():
+            for auth_name, backend in AUTH_BACKENDS.items():
+                cache.clear()
+                with override_settings(
+                    SESSION_ENGINE=engine,
+                    AUTHENTICATION_BACKENDS=[backend],
+                ):
+                    median, queries = self.measure(
+                        user, options['url'], options['runs'])
+                self.stdout.write(
+                    '{:<15} {:<7} {:8.2f} ms {:5.1f} queries'.format(
+                        session_name, auth_name, median * 1000, queries))
@@ -0,0 +1,63 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PROBE = '''
+import json, os, sys, time
+started = time.perf_counter()
+from yatube.wsgi import application
+loaded = time.perf_counter()
+from django.test import Client
+client = Client()
+request_started = time.perf_counter()
+client.get(sys.argv[1])
+first = time.perf_counter() - request_started
+request_started = time.perf_counter()
+client.get(sys.argv[1])
+second = time.perf_counter() - request_started
+print(json.dumps({
+    'startup': loaded - started,
+    'first_request': first,
+    'second_request': second,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время старта WSGI-приложения и задержку первого '
+            'запроса с прогревом и без него')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/about/author/')
+        parser.add_argument('--runs', type=int, default=5)
+
+    def probe(self, url, warmup):
+        env = dict(
+            os.environ,
+            YATUBE_WARMUP='1' if warmup else '0',
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'),
+        )
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE, url],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        return json.loads(output.decode().strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        for warmup in (False, True):
+            runs = [
+                self.probe(options['url'], warmup)
+                for _ in range(options['runs'])
+            ]
+            self.stdout.write('warm-up {}:'.format('on' if warmup else 'off'))
+            for metric in ('startup', 'first_request', 'second_request'):
+                median = statistics.median(run[metric] for run in runs)
+                self.stdout.write(
+                    '  {:<15} {:8.2f} ms'.format(metric, median * 1000))
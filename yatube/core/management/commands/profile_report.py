@@ -0,0 +1,40 @@
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import profiles
+
+
+class Command(BaseCommand):
+    help = ('Без аргументов перечисляет view с профилями; с именем view '
+            'сводит её профили в один вывод для flamegraph.pl или '
+            'speedscope.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('view', nargs='?', help='Например, posts:index.')
+
+    def handle(self, *args, **options):
+        if options['view'] is None:
+            self.list_views()
+            return
+        paths = profiles(options['view'])
+        if not paths:
+            raise CommandError(f'Нет профилей {options["view"]}')
+        stacks = Counter()
+        for path in paths:
+            with open(path) as file:
+                for line in file:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    stacks[stack] += int(count)
+        for stack, count in stacks.most_common():
+            self.stdout.write(f'{stack} {count}')
+
+    def list_views(self):
+        try:
+            names = sorted(os.listdir(settings.PROFILING_DIR))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            self.stdout.write(f'{name}: {len(profiles(name))}')
@@ -0,0 +1,33 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import drain
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди EMAIL_QUEUE_DIR; с --interval '
+            'работает как фоновый воркер. Запускайте один воркер на очередь.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между проходами в секундах; 0 -- один проход.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent = drain()
+            except Exception:
+                # Недоступный сервер не должен останавливать воркер.
+                logger.exception('Failed to drain the mail queue')
+                sent = 0
+            if sent:
+                self.stdout.write(f'Отправлено писем: {sent}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
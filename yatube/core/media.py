@@ -0,0 +1,145 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def check_access(path):
+    """Можно ли отдавать файл MEDIA_ROOT/path.
+
+    Отдаются только каталоги из MEDIA_DIRECTORIES, без скрытых и
+    временных файлов. Если для каталога указана функция проверки,
+    она получает путь и решает сама.
+    """
+    name = posixpath.basename(path)
+    if name.startswith('.') or name.endswith('.tmp'):
+        return False
+    for directory, check in settings.MEDIA_DIRECTORIES.items():
+        if path.startswith(directory):
+            return check is None or import_string(check)(path)
+    return False
+
+
+def cache_control(path):
+    # Имя миниатюры -- хэш исходника и опций, поэтому её содержимое
+    # по этому адресу не меняется никогда.
+    if path.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_MAX_AGE}'
+
+
+def parse_range(header, size):
+    """(start, end) из единственного диапазона Range или None.
+
+    Несколько диапазонов и чужие единицы игнорируются: тогда
+    отдаётся весь файл. Для невыполнимого диапазона -- ValueError.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def read_range(file, start, length, block_size=FileResponse.block_size):
+    file.seek(start)
+    try:
+        while length > 0:
+            chunk = file.read(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_response(request, fullpath, size):
+    """Отдача файла самим Django, с поддержкой одного диапазона Range."""
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE', ''), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(fullpath, 'rb'))
+    start, end = byte_range
+    response = FileResponse(
+        read_range(open(fullpath, 'rb'), start, end - start + 1),
+        status=206)
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def resolve(path):
+    """Путь на диске и os.stat файла, который можно отдать, иначе 404."""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not check_access(path):
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return fullpath, stat
+
+
+@require_safe
+def serve(request, path):
+    """Отдаёт файл из MEDIA_ROOT после проверки доступа.
+
+    При MEDIA_ACCEL='nginx' сам файл отдаёт nginx по X-Accel-Redirect
+    (внутренний location MEDIA_ACCEL_PREFIX), при 'apache' -- модуль
+    X-Sendfile, иначе -- Django, с поддержкой Range.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath, stat = resolve(path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL == 'nginx':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path))
+    elif settings.MEDIA_ACCEL == 'apache':
+        response = HttpResponse()
+        response['X-Sendfile'] = fullpath
+    else:
+        response = file_response(request, fullpath, stat.st_size)
+    if response.status_code == 416:
+        return response
+    content_type = mimetypes.guess_type(fullpath)[0]
+    if content_type and response.status_code != 304:
+        response['Content-Type'] = content_type
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control(path)
+    response['Accept-Ranges'] = 'bytes'
+    return response
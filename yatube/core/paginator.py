@@ -0,0 +1,112 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(model, using='default'):
+    """Число строк таблицы по статистике планировщика или None.
+
+    SQLite хранит его в sqlite_stat1 (заполняется командой ANALYZE),
+    PostgreSQL -- в pg_class.reltuples. Для остальных СУБД и таблиц
+    без статистики возвращается None.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(sql, [table])
+        except DatabaseError:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+def cached_estimate(model, using='default'):
+    """estimate_count, запомненная на PAGINATOR_COUNT_TIMEOUT секунд."""
+    key = 'paginator:estimate:{}:{}'.format(using, model._meta.db_table)
+    estimate = cache.get(key)
+    if estimate is None:
+        estimate = estimate_count(model, using)
+        if estimate is None:
+            estimate = -1
+        cache.set(key, estimate, settings.PAGINATOR_COUNT_TIMEOUT)
+    return None if estimate < 0 else estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, не считающий COUNT(*) по большой таблице на каждый запрос.
+
+    Для запроса без условий берётся оценка планировщика, для остальных
+    -- точное число, закэшированное на PAGINATOR_COUNT_TIMEOUT секунд.
+    Меньше ESTIMATED_COUNT_THRESHOLD строк всегда считается точно.
+    При оценке последние страницы могут оказаться пустыми или
+    недосчитанными, поэтому count_is_exact сообщает шаблону, можно ли
+    ссылаться на последнюю страницу.
+    """
+    count_is_exact = True
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        if not query.where:
+            estimate = cached_estimate(
+                self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= threshold:
+                self.count_is_exact = False
+                return estimate
+        sql, params = query.sql_with_params()
+        key = 'paginator:count:' + hashlib.md5(
+            repr((sql, params)).encode()).hexdigest()
+        count = cache.get(key)
+        if count is not None:
+            self.count_is_exact = False
+            return count
+        count = super().count
+        if count >= threshold:
+            cache.set(key, count, settings.PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+
+ELLIPSIS = '…'
+
+
+def elided_page_range(paginator, number, on_each_side=3, on_ends=2):
+    """Номера страниц вокруг текущей и по краям, пропуски -- ELLIPSIS.
+
+    Повторяет Paginator.get_elided_page_range из Django 3.2. Если
+    число страниц оценочное, последние номера не показываются.
+    """
+    number = paginator.validate_number(number)
+    num_pages = paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from paginator.page_range
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        if getattr(paginator, 'count_is_exact', True):
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
@@ -0,0 +1,132 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = '.folded'
+
+
+def collapse(frame):
+    """Стек кадра в строку 'модуль:функция;...' от корня к вершине."""
+    names = []
+    while frame is not None:
+        names.append('{}:{}'.format(
+            frame.f_globals.get('__name__', '?'), frame.f_code.co_name))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Раз в interval секунд запоминает стек потока thread_id.
+
+    Статистический профилировщик не замедляет сам код запроса: вся
+    работа -- в отдельном потоке, который просыпается по таймеру.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def view_directory(view_name):
+    """Каталог профилей view; ':' в имени заменяется точкой."""
+    return os.path.join(settings.PROFILING_DIR,
+                        (view_name or 'unresolved').replace(':', '.'))
+
+
+def profiles(view_name):
+    """Файлы профилей view от старых к новым."""
+    directory = view_directory(view_name)
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(directory, name) for name in names
+        if name.endswith(SUFFIX) and not name.startswith('.')
+    ]
+
+
+def save(view_name, stacks):
+    """Пишет стеки в формате flamegraph.pl и удаляет лишние старые.
+
+    У каждой view хранится не больше PROFILING_MAX_FILES профилей.
+    """
+    directory = view_directory(view_name)
+    os.makedirs(directory, exist_ok=True)
+    name = '{:020d}-{}'.format(time.time_ns(), uuid.uuid4().hex)
+    temp_path = os.path.join(directory, '.' + name)
+    with open(temp_path, 'w') as file:
+        for stack, count in stacks.most_common():
+            file.write(f'{stack} {count}\n')
+    path = os.path.join(directory, name + SUFFIX)
+    os.replace(temp_path, path)
+    stale = profiles(view_name)[:-settings.PROFILING_MAX_FILES]
+    for old_path in stale:
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+class ProfilingMiddleware:
+    """Профилирует выборку запросов и складывает стеки по именам view.
+
+    Включается PROFILING: профилируется доля PROFILING_RATE запросов
+    и запросы сотрудников с заголовком PROFILING_HEADER. Стоит после
+    AuthenticationMiddleware, чтобы заголовок проверялся по
+    пользователю. Профили читает команда profile_report.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def sampled(self, request):
+        if settings.PROFILING_HEADER in request.META:
+            user = getattr(request, 'user', None)
+            return user is not None and user.is_staff
+        return random.random() < settings.PROFILING_RATE
+
+    def __call__(self, request):
+        if not self.sampled(request):
+            return self.get_response(request)
+        sampler = Sampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+        sampler.start()
+        try:
+            return self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+            match = request.resolver_match
+            view_name = match.view_name if match is not None else None
+            if stacks:
+                try:
+                    save(view_name, stacks)
+                except OSError:
+                    logger.exception('Failed to save profile of %s',
+                                     view_name)
@@ -0,0 +1,135 @@
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+BUCKET_KEY = 'ratelimit:{}:{}:{}'
+LOCK_SUFFIX = ':lock'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): столько-то запросов за столько-то секунд."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """Адрес клиента с учётом доверенных прокси.
+
+    За фронтовым nginx REMOTE_ADDR у всех запросов один -- адрес прокси.
+    Если запрос пришёл с адреса из RATELIMIT_TRUSTED_PROXIES, клиентом
+    считается ближайший справа адрес X-Forwarded-For, которого нет среди
+    доверенных: адреса левее мог подставить сам клиент.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    trusted = settings.RATELIMIT_TRUSTED_PROXIES
+    if address not in trusted:
+        return address
+    forwarded = [
+        item.strip()
+        for item in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        if item.strip()
+    ]
+    for address in reversed(forwarded):
+        if address not in trusted:
+            return address
+    return address
+
+
+def request_keys(request, keys):
+    for key in keys:
+        if key == 'user':
+            if request.user.is_authenticated:
+                yield 'user', request.user.pk
+        elif key == 'ip':
+            yield 'ip', client_ip(request)
+        else:
+            raise ValueError(f'Unknown rate limit key: {key!r}')
+
+
+@contextmanager
+def locked(keys, timeout=1, poll_interval=0.005):
+    """Держит блокировки `<ключ>:lock` корзин keys на время пересчёта.
+
+    Блокировки берутся через атомарный cache.add в одном порядке, так
+    что два запроса не ждут друг друга по кругу. Зависшая блокировка
+    истекает через timeout секунд, и запрос идёт без неё.
+    """
+    held = []
+    try:
+        for key in sorted(keys):
+            lock_key = key + LOCK_SUFFIX
+            deadline = time.monotonic() + timeout
+            while not cache.add(lock_key, 1, timeout):
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(poll_interval)
+            else:
+                held.append(lock_key)
+        yield
+    finally:
+        if held:
+            cache.delete_many(held)
+
+
+def consume(buckets, capacity, refill, now=None):
+    """Снимает по жетону из каждой корзины; возвращает 0 или секунды.
+
+    Состояние корзины -- (жетоны, время последнего пересчёта);
+    жетоны копятся со скоростью refill в секунду до capacity. Жетоны
+    снимаются, только если они есть во всех корзинах: отказ по IP не
+    тратит жетон пользователя. Пересчёт идёт под блокировкой корзин,
+    поэтому одновременные запросы не превышают лимит.
+    """
+    now = time.time() if now is None else now
+    timeout = math.ceil(capacity / refill)
+    with locked(buckets):
+        states = cache.get_many(buckets)
+        tokens = {}
+        for bucket in buckets:
+            state = states.get(bucket)
+            if state is None:
+                tokens[bucket] = capacity
+            else:
+                stored, stamp = state
+                tokens[bucket] = min(
+                    capacity, stored + (now - stamp) * refill)
+        available = min(tokens.values(), default=capacity)
+        if available >= 1:
+            cache.set_many({
+                bucket: (value - 1, now) for bucket, value in tokens.items()
+            }, timeout)
+            return 0
+    return math.ceil((1 - available) / refill)
+
+
+def ratelimit(name, rate, keys=('user', 'ip'), methods=('POST',)):
+    """Ограничивает частоту запросов к view корзиной жетонов.
+
+    Отдельные корзины заводятся на пользователя и на IP; запрос
+    проходит, только если жетон нашёлся в каждой. Частоту можно
+    переопределить в settings.RATELIMITS[name], None отключает лимит.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limit = settings.RATELIMITS.get(name, rate)
+            if limit is None or request.method not in methods:
+                return view(request, *args, **kwargs)
+            count, period = parse_rate(limit)
+            buckets = [
+                BUCKET_KEY.format(name, kind, value)
+                for kind, value in request_keys(request, keys)
+            ]
+            retry_after = consume(buckets, count, count / period)
+            if retry_after:
+                return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
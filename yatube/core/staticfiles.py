@@ -0,0 +1,149 @@
+import gzip
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepted_encodings
+from .media import IMMUTABLE_MAX_AGE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.xml',
+                '.ico', '.map')
+# Сжатая копия пишется, только если она заметно меньше оригинала.
+MIN_RATIO = 0.9
+# Порядок предпочтения: brotli сжимает текст лучше gzip.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэшированные имена плюс сжатые копии .gz и .br рядом с файлами.
+
+    Текстовые файлы сжимаются один раз в collectstatic, а не на каждый
+    запрос; .br пишется, если установлен пакет brotli.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data) * MIN_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def scan(root):
+    """Индекс STATIC_ROOT: имя -> (путь, сжатые варианты, хэшированное ли).
+
+    Хэшированные имена берутся из манифеста ManifestStaticFilesStorage:
+    их содержимое не меняется, и кэшировать их можно навсегда.
+    """
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as file:
+            hashed = set(json.load(file)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        hashed = set()
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        present = set(filenames)
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            variants = [
+                (encoding, path + suffix) for encoding, suffix in ENCODINGS
+                if filename + suffix in present
+            ]
+            files[name] = (path, variants, name in hashed)
+    return files
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT прямо из процесса.
+
+    Ставится сразу после SecurityMiddleware, чтобы запросы к статике
+    не проходили сессии, CSRF и аутентификацию. Если клиент принимает
+    brotli или gzip и у файла есть сжатая копия, отдаётся она.
+    Файлы, которых нет в STATIC_ROOT, идут дальше по цепочке. С DEBUG
+    выключается: в разработке статику отдаёт runserver из приложений,
+    а не старая копия из collectstatic.
+    """
+
+    def __init__(self, get_response):
+        if (settings.DEBUG or not settings.STATIC_ROOT
+                or '://' in settings.STATIC_URL):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = None
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            if self.files is None:
+                self.files = scan(settings.STATIC_ROOT)
+            entry = self.files.get(request.path_info[len(self.prefix):])
+            if entry is not None:
+                return self.serve(request, *entry)
+        return self.get_response(request)
+
+    def serve(self, request, path, variants, immutable):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding, body = next(
+            ((encoding, variant) for encoding, variant in variants
+             if encoding in accepted),
+            (None, path),
+        )
+        stat = os.stat(body)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(body, 'rb'),
+                content_type=mimetypes.guess_type(path)[0]
+                or 'application/octet-stream',
+            )
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if immutable:
+            response['Cache-Control'] = (
+                f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}')
+        return response
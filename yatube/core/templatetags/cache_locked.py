@@ -0,0 +1,52 @@
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+
+from ..cache import get_or_compute
+
+register = template.Library()
+
+STALE_TIMEOUT = 60
+
+
+class LockedCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.expire_time = expire_time
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        expire_time = int(self.expire_time.resolve(context))
+        try:
+            fragment_cache = caches['template_fragments']
+        except InvalidCacheBackendError:
+            fragment_cache = caches['default']
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            fragment_cache,
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            timeout=expire_time,
+            stale_timeout=STALE_TIMEOUT,
+        )
+
+
+@register.tag
+def cache_locked(parser, token):
+    """Как {% cache %}, но фрагмент пересчитывает только один запрос.
+
+    {% cache_locked [expire_time] [fragment_name] [var1] [var2] .. %}
+    """
+    nodelist = parser.parse(('endcache_locked',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.')
+    return LockedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
@@ -0,0 +1,21 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.holes import marker, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, *args):
+    """{% hole 'name' arg .. %} -- фрагмент, свой у каждого пользователя.
+
+    На страницах cache_view(holes=True) вместо фрагмента ставится
+    метка, которую core.holes.fill заполняет при каждом ответе.
+    """
+    request = context.get('request')
+    if request is None:
+        return ''
+    if getattr(request, 'punching_holes', False):
+        return mark_safe(marker(name, list(args)))
+    return mark_safe(render_hole(request, name, list(args)))
@@ -0,0 +1,17 @@
+from django import template
+
+from ..paginator import ELLIPSIS, elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_range(page_obj, on_each_side=3, on_ends=2):
+    """{% page_range page_obj as pages %} -- номера для ссылок пагинатора."""
+    return list(elided_page_range(
+        page_obj.paginator, page_obj.number, on_each_side, on_ends))
+
+
+@register.filter
+def is_ellipsis(value):
+    return value == ELLIPSIS
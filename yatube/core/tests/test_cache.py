@@ -0,0 +1,135 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import get_or_compute
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'two_tier': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'two_tier_test',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 2,
+            'LOCAL_TIMEOUT': 60,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared_test',
+    },
+}
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['two_tier']
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_write_goes_to_shared_cache(self):
+        """Запись видна в общем кэше"""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.shared.get('key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_local_hit_skips_shared_cache(self):
+        """Повторное чтение обслуживается локальным LRU"""
+        self.shared.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.shared.delete('key')
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_delete_and_lru_eviction(self):
+        """Удаление и вытеснение из локального LRU"""
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.shared.clear()
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'b': 2, 'c': 3})
+        self.cache.delete('b')
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_local_values_are_copies(self):
+        """Изменение полученного объекта не портит кэш"""
+        self.cache.set('key', [1])
+        self.cache.get('key').append(2)
+        self.assertEqual(self.cache.get('key'), [1])
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class StampedeTest(SimpleTestCase):
+    def setUp(self):
+        caches['two_tier'].clear()
+        caches['shared'].clear()
+
+    def test_single_computation_under_concurrency(self):
+        """Значение вычисляется один раз при одновременных промахах"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'page'
+
+        results = []
+
+        def worker():
+            results.append(get_or_compute(
+                caches['two_tier'], 'feed', compute, timeout=60,
+                poll_interval=0.01,
+            ))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['page'] * 8)
+
+    def test_single_recomputation_per_expiry(self):
+        """После истечения срока пересчитывает один запрос,
+        остальные получают устаревшее значение"""
+        cache = caches['shared']
+        versions = iter(range(1, 100))
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return next(versions)
+
+        get_or_compute(cache, 'feed', compute, timeout=1, stale_timeout=60)
+        time.sleep(1.1)
+        results = []
+
+        def worker():
+            results.append(get_or_compute(
+                cache, 'feed', compute, timeout=1, stale_timeout=60))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sorted(results), [1] * 7 + [2])
+
+    def test_early_refresh(self):
+        """Долгое вычисление обновляется заранее, до истечения срока"""
+        cache = caches['shared']
+        cache.set('feed', ('old', 1000.0, time.time() + 5), 60)
+        with mock.patch('core.cache.random') as rng:
+            rng.random.return_value = 0.0
+            value = get_or_compute(cache, 'feed', lambda: 'new', timeout=60)
+            self.assertEqual(value, 'old')
+            rng.random.return_value = 0.5
+            value = get_or_compute(cache, 'feed', lambda: 'new', timeout=60)
+        self.assertEqual(value, 'new')
@@ -0,0 +1,51 @@
+from django.test import SimpleTestCase, override_settings
+
+from .. import checks
+
+SMALL_CACHE = {
+    'default': {
+        'BACKEND': checks.LOCMEM_CACHE,
+    }
+}
+SQLITE = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+
+class PerformanceChecksTest(SimpleTestCase):
+    @override_settings(DEBUG=True, YATUBE_ENV='prod')
+    def test_debug_in_prod(self):
+        """DEBUG в prod-профиле даёт предупреждение"""
+        ids = [error.id for error in checks.check_debug(None)]
+        self.assertEqual(ids, ['core.W001'])
+
+    @override_settings(DEBUG=True, YATUBE_ENV='dev')
+    def test_debug_in_dev(self):
+        """DEBUG в dev-профиле допустим"""
+        self.assertEqual(checks.check_debug(None), [])
+
+    @override_settings(CACHES=SMALL_CACHE)
+    def test_small_locmem_cache(self):
+        """LocMemCache с размером по умолчанию даёт предупреждение"""
+        ids = [error.id for error in checks.check_cache_size(None)]
+        self.assertEqual(ids, ['core.W002'])
+
+    @override_settings(DEBUG=True, YATUBE_ENV='prod', DATABASES=SQLITE)
+    def test_prod_without_cached_templates_and_connections(self):
+        """prod без кэша шаблонов и постоянных соединений"""
+        self.assertEqual(
+            [error.id for error in checks.check_template_loaders(None)],
+            ['core.W003'],
+        )
+        self.assertEqual(
+            [error.id for error in checks.check_persistent_connections(None)],
+            ['core.W004'],
+        )
+
+    def test_current_settings_pass(self):
+        """Текущие настройки не вызывают предупреждений"""
+        self.assertEqual(checks.check_cache_size(None), [])
+        self.assertEqual(checks.check_query_logging(None), [])
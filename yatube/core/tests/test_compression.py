@@ -0,0 +1,68 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .. import compression
+from ..cache import cache_view
+from ..compression import CompressionMiddleware
+
+PAGE = '<p>Лента постов</p>' * 200
+
+
+@cache_view(60)
+def cached_page(request):
+    return HttpResponse(PAGE)
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def get(self, view, **headers):
+        request = self.factory.get('/page/', **headers)
+        request.user = AnonymousUser()
+        middleware = CompressionMiddleware(view)
+        return middleware(request)
+
+    def test_compresses_when_accepted(self):
+        """Большой HTML сжимается, если клиент принимает gzip"""
+        response = self.get(lambda request: HttpResponse(PAGE),
+                            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content).decode(), PAGE)
+        self.assertEqual(response['Content-Length'],
+                         str(len(response.content)))
+        response = self.get(lambda request: HttpResponse(PAGE))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_skips_tiny_and_encoded_responses(self):
+        """Маленькие и уже сжатые ответы отдаются как есть"""
+        response = self.get(lambda request: HttpResponse('ok'),
+                            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        def encoded(request):
+            response = HttpResponse(PAGE)
+            response['Content-Encoding'] = 'identity'
+            return response
+        response = self.get(encoded, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.content.decode(), PAGE)
+
+    def test_cached_response_not_recompressed(self):
+        """Страница из cache_view сжимается один раз, при записи в кэш"""
+        with mock.patch.object(compression, 'compress',
+                               wraps=compression.compress) as compress:
+            first = self.get(cached_page, HTTP_ACCEPT_ENCODING='gzip')
+            calls = compress.call_count
+            second = self.get(cached_page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compress.call_count, calls)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content).decode(), PAGE)
+        plain = self.get(cached_page)
+        self.assertEqual(plain.content.decode(), PAGE)
@@ -0,0 +1,140 @@
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+from io import StringIO
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ..mail import (FAILED_DIR, SUFFIX, QueuedEmailBackend, drain,
+                    queued_paths)
+
+QUEUE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма и считает их."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith('RCPT') and 'REJECT@' in command:
+                self.reply('550 No such user')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                for line in self.rfile:
+                    if line == b'.\r\n':
+                        break
+                self.server.messages += 1
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = 0
+
+
+@override_settings(EMAIL_QUEUE_DIR=QUEUE_DIR)
+class QueuedEmailTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = SMTPServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(QUEUE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(QUEUE_DIR, ignore_errors=True)
+        os.makedirs(QUEUE_DIR)
+
+    def smtp_connection(self):
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1',
+            port=self.server.server_address[1],
+        )
+
+    def test_messages_are_queued_not_sent(self):
+        """Бэкенд только складывает письма в очередь"""
+        backend = QueuedEmailBackend()
+        messages = [
+            EmailMessage('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+            for _ in range(3)
+        ]
+        self.assertEqual(backend.send_messages(messages), 3)
+        self.assertEqual(len(queued_paths(QUEUE_DIR)), 3)
+        self.assertEqual(drain(connection=self.smtp_connection()), 3)
+
+    def test_drain_uses_single_connection(self):
+        """Очередь уходит через одно SMTP-соединение"""
+        connections = self.server.connections
+        messages = self.server.messages
+        backend = QueuedEmailBackend()
+        backend.send_messages([
+            EmailMessage('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+            for _ in range(5)
+        ])
+        sent = drain(connection=self.smtp_connection())
+        self.assertEqual(sent, 5)
+        self.assertEqual(self.server.connections - connections, 1)
+        self.assertEqual(self.server.messages - messages, 5)
+        self.assertEqual(queued_paths(QUEUE_DIR), [])
+
+    def test_bad_messages_moved_to_failed(self):
+        """Битый файл и отвергнутое письмо уходят в failed/"""
+        backend = QueuedEmailBackend()
+        backend.send_messages([
+            EmailMessage('Тема', 'Текст', 'from@yatube.ru', [to])
+            for to in ('reject@yatube.ru', 'to@yatube.ru')
+        ])
+        with open(os.path.join(QUEUE_DIR, '0-broken' + SUFFIX), 'wb') as file:
+            file.write(b'not a pickle')
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(drain(connection=self.smtp_connection()), 1)
+        self.assertEqual(queued_paths(QUEUE_DIR), [])
+        self.assertEqual(
+            len(os.listdir(os.path.join(QUEUE_DIR, FAILED_DIR))), 2)
+
+    def test_worker_survives_unavailable_server(self):
+        """Недоступный SMTP-сервер не роняет send_queued_mail"""
+        QueuedEmailBackend().send_messages([
+            EmailMessage('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+        ])
+        with socket.socket() as closed:
+            closed.bind(('127.0.0.1', 0))
+            port = closed.getsockname()[1]
+        with self.settings(
+                EMAIL_QUEUE_BACKEND=(
+                    'django.core.mail.backends.smtp.EmailBackend'),
+                EMAIL_HOST='127.0.0.1', EMAIL_PORT=port), \
+                self.assertLogs('core.management.commands.send_queued_mail',
+                                'ERROR'):
+            call_command('send_queued_mail', stdout=StringIO())
+        self.assertEqual(len(queued_paths(QUEUE_DIR)), 1)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+small_gif = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B'
+             )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_ACCEL='')
+class MediaServeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', small_gif, content_type='image/gif'),
+        )
+        cls.url = settings.MEDIA_URL + cls.post.image.name
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'cache', 'ab'))
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'cache', 'ab',
+                               'thumb.gif'), 'wb') as file:
+            file.write(small_gif)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_original_served_with_cache_headers(self):
+        """Оригинал отдаётся с типом, Last-Modified и ограниченным сроком"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read(response), small_gif)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.MEDIA_MAX_AGE}')
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_thumbnail_is_immutable(self):
+        """Миниатюры кэшируются навсегда"""
+        response = self.client.get(settings.MEDIA_URL + 'cache/ab/thumb.gif')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        """Range отдаёт кусок файла, невыполнимый диапазон -- 416"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.read(response), small_gif[2:6])
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 2-5/{len(small_gif)}')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(self.read(response), small_gif[-3:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_access_checks(self):
+        """Не отдаются чужие каталоги, выход за MEDIA_ROOT и файлы
+        удалённых постов"""
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'secret.txt'), 'w') as file:
+            file.write('secret')
+        for path in ('secret.txt', 'posts/../secret.txt',
+                     'posts/missing.gif'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+        Post.objects.filter(pk=self.post.pk).update(image='')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_offload_to_web_server(self):
+        """С MEDIA_ACCEL файл отдаёт фронтовой сервер"""
+        with self.settings(MEDIA_ACCEL='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + self.post.image.name)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_ACCEL='apache'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.post.image.path)
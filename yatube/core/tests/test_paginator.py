@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from posts.models import Post
+
+from ..paginator import ELLIPSIS, EstimatedCountPaginator, elided_page_range
+
+User = get_user_model()
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(3))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_uses_planner_estimate(self):
+        """Без фильтров число строк берётся из статистики СУБД"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(Post.objects.order_by('pk'), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.count_is_exact)
+
+    def test_filtered_count_is_cached(self):
+        """Точное число строк запроса с условием берётся из кэша"""
+        posts = Post.objects.filter(author=self.user).order_by('pk')
+        paginator = EstimatedCountPaginator(posts, 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.count_is_exact)
+        paginator = EstimatedCountPaginator(posts, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 3)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=10)
+    def test_small_counts_are_exact(self):
+        """Маленькие выборки считаются точно при каждом обращении"""
+        posts = Post.objects.filter(author=self.user).order_by('pk')
+        EstimatedCountPaginator(posts, 2).count
+        with self.assertNumQueries(1):
+            EstimatedCountPaginator(posts, 2).count
+
+
+class ElidedPageRangeTest(SimpleTestCase):
+    def pages(self, pages, number, exact=True):
+        paginator = Paginator(range(pages), 1)
+        paginator.count_is_exact = exact
+        return list(elided_page_range(paginator, number))
+
+    def test_short_range_is_complete(self):
+        """Несколько страниц показываются все"""
+        self.assertEqual(self.pages(5, 3), [1, 2, 3, 4, 5])
+
+    def test_long_range_is_elided(self):
+        """Вокруг текущей страницы окно, по краям -- первые и последние"""
+        self.assertEqual(
+            self.pages(5000, 100),
+            [1, 2, ELLIPSIS, 97, 98, 99, 100, 101, 102, 103, ELLIPSIS,
+             4999, 5000])
+
+    def test_estimated_range_hides_last_pages(self):
+        """При оценочном числе страниц последние номера не показываются"""
+        self.assertEqual(
+            self.pages(5000, 1, exact=False), [1, 2, 3, 4, ELLIPSIS])
+
+    def test_include_renders_window(self):
+        """Шаблон пагинатора не выводит ссылку на каждую страницу"""
+        page_obj = Paginator(range(50000), 10).page(2500)
+        html = render_to_string(
+            'posts/includes/paginator.html', {'page_obj': page_obj})
+        self.assertIn('?page=2503', html)
+        self.assertNotIn('?page=2504', html)
+        self.assertIn('?page=5000', html)
+        self.assertLess(html.count('page-item'), 20)
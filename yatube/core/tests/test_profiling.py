@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..profiling import ProfilingMiddleware, profiles
+
+User = get_user_model()
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class Match:
+    view_name = 'posts:index'
+
+
+def slow_view(request):
+    request.resolver_match = Match()
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        pass
+    return HttpResponse('ok')
+
+
+@override_settings(PROFILING=True, PROFILING_RATE=0,
+                   PROFILING_INTERVAL=0.001, PROFILING_MAX_FILES=2,
+                   PROFILING_DIR=TEMP_PROFILING_DIR)
+class ProfilingMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        self.factory = RequestFactory()
+        self.middleware = ProfilingMiddleware(slow_view)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def get(self, user=None, **headers):
+        request = self.factory.get('/', **headers)
+        request.user = user or AnonymousUser()
+        return self.middleware(request)
+
+    def test_disabled_by_default(self):
+        """Без PROFILING middleware выключается"""
+        with self.settings(PROFILING=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(slow_view)
+
+    def test_header_only_for_staff(self):
+        """Заголовок X-Profile действует только для сотрудников"""
+        self.get(HTTP_X_PROFILE='1')
+        self.assertEqual(profiles('posts:index'), [])
+        self.get(User(username='staff', is_staff=True), HTTP_X_PROFILE='1')
+        paths = profiles('posts:index')
+        self.assertEqual(len(paths), 1)
+        with open(paths[0]) as file:
+            stack, count = file.readline().rsplit(' ', 1)
+        self.assertIn('core.tests.test_profiling:slow_view', stack)
+        self.assertGreater(int(count), 0)
+
+    def test_sampled_requests_kept_within_limit(self):
+        """Профилируется выборка запросов, старые профили удаляются"""
+        with self.settings(PROFILING_RATE=1):
+            for _ in range(3):
+                self.assertEqual(self.get().content, b'ok')
+        self.assertEqual(len(profiles('posts:index')), 2)
+        output = StringIO()
+        call_command('profile_report', 'posts:index', stdout=output)
+        self.assertIn('slow_view', output.getvalue())
+        output = StringIO()
+        call_command('profile_report', stdout=output)
+        self.assertEqual(output.getvalue(), 'posts.index: 2\n')
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from ..ratelimit import client_ip, consume
+
+User = get_user_model()
+
+
+class TokenBucketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        """Жетоны расходуются и восстанавливаются со временем"""
+        self.assertEqual(consume(['bucket'], 2, 1, now=100), 0)
+        self.assertEqual(consume(['bucket'], 2, 1, now=100), 0)
+        self.assertEqual(consume(['bucket'], 2, 1, now=100), 1)
+        self.assertEqual(consume(['bucket'], 2, 1, now=101), 0)
+
+    def test_denied_request_takes_no_tokens(self):
+        """Отказ по одной корзине не тратит жетоны другой"""
+        consume(['ip'], 1, 1, now=100)
+        self.assertEqual(consume(['ip', 'user'], 1, 1, now=100), 1)
+        self.assertEqual(consume(['user'], 1, 1, now=100), 0)
+
+    def test_concurrent_requests_within_limit(self):
+        """Одновременные запросы не получают больше capacity жетонов"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: consume(['bucket'], 5, 0.001, now=100), range(20)))
+        self.assertEqual(results.count(0), 5)
+
+
+@override_settings(RATELIMIT_TRUSTED_PROXIES=['127.0.0.1'])
+class ClientIpTest(SimpleTestCase):
+    def ip(self, remote_addr, forwarded=None):
+        headers = {'REMOTE_ADDR': remote_addr}
+        if forwarded is not None:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded
+        return client_ip(RequestFactory().get('/', **headers))
+
+    def test_forwarded_only_from_trusted_proxy(self):
+        """X-Forwarded-For учитывается только от доверенного прокси"""
+        self.assertEqual(self.ip('127.0.0.1', '10.0.0.5'), '10.0.0.5')
+        self.assertEqual(self.ip('10.0.0.9', '10.0.0.5'), '10.0.0.9')
+        self.assertEqual(self.ip('127.0.0.1'), '127.0.0.1')
+
+    def test_spoofed_addresses_ignored(self):
+        """Адреса, подставленные клиентом левее, не учитываются"""
+        self.assertEqual(
+            self.ip('127.0.0.1', '1.2.3.4, 10.0.0.5, 127.0.0.1'), '10.0.0.5')
+
+
+@override_settings(RATELIMITS={'post_create': '2/m', 'signup': '1/m'})
+class RateLimitViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_create_limited(self):
+        """Третий пост за минуту получает 429 с Retry-After"""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'Текст'})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(url, {'text': 'Текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_reads_not_limited(self):
+        """GET-запросы не расходуют жетоны"""
+        url = reverse('posts:post_create')
+        for _ in range(5):
+            self.assertEqual(self.authorized_client.get(url).status_code, 200)
+
+    def test_signup_limited_by_ip(self):
+        """Регистрация ограничена по IP"""
+        url = reverse('users:signup')
+        self.guest_client.post(url, {})
+        response = self.guest_client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        other_ip = self.guest_client.post(url, {}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other_ip.status_code, 200)
+
+    @override_settings(RATELIMIT_TRUSTED_PROXIES=['127.0.0.1'])
+    def test_signup_behind_proxy_limited_per_client(self):
+        """За прокси у каждого клиента своя корзина"""
+        url = reverse('users:signup')
+        self.guest_client.post(url, {}, HTTP_X_FORWARDED_FOR='10.0.0.3')
+        response = self.guest_client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        other_ip = self.guest_client.post(
+            url, {}, HTTP_X_FORWARDED_FOR='10.0.0.4')
+        self.assertEqual(other_ip.status_code, 200)
@@ -0,0 +1,76 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from ..compression import accepted_encodings
+from ..staticfiles import StaticFilesMiddleware
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'),
+)
+class CompressedStaticFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+        cls.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """collectstatic кладёт .gz рядом с хэшированным CSS, но не с PNG"""
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        path = os.path.join(TEMP_STATIC_ROOT, self.css)
+        with open(path, 'rb') as original, \
+                gzip.open(path + '.gz') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_STATIC_ROOT, logo + '.gz')))
+
+    def test_serves_compressed_variant(self):
+        """Клиенту с gzip отдаётся сжатая копия, хэшированное -- навсегда"""
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_disabled_in_debug(self):
+        """С DEBUG статику из STATIC_ROOT middleware не отдаёт"""
+        with self.settings(DEBUG=True):
+            with self.assertRaises(MiddlewareNotUsed):
+                StaticFilesMiddleware(lambda request: None)
+
+    def test_unhashed_name_cached_briefly(self):
+        """Имя без хэша кэшируется только на STATIC_MAX_AGE"""
+        response = self.client.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.STATIC_MAX_AGE}')
+
+    def test_accepted_encodings(self):
+        """Кодировки с q=0 считаются запрещёнными"""
+        self.assertEqual(accepted_encodings('gzip;q=0.5, br;q=0, identity'),
+                         {'gzip', 'identity'})
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..warmup import compile_templates, populate_resolvers, warm_up
+
+CACHED_TEMPLATES = [
+    dict(
+        settings.TEMPLATES[0],
+        APP_DIRS=False,
+        OPTIONS=dict(
+            settings.TEMPLATES[0]['OPTIONS'],
+            loaders=[
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        ),
+    ),
+]
+
+
+class WarmUpTest(SimpleTestCase):
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_templates_compiled_into_cache(self):
+        """Прогрев кладёт проектные шаблоны в кэш загрузчика"""
+        self.assertGreater(compile_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+            if hasattr(template, 'origin')
+        }
+        self.assertIn('posts/includes/paginator.html', cached)
+        self.assertIn('includes/header.html', cached)
+
+    def test_resolvers_populated(self):
+        """Прогрев заполняет именованные URL всех пространств имён"""
+        self.assertGreater(populate_resolvers(), 0)
+        self.assertGreater(warm_up()['urls'], 0)
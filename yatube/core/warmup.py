@@ -0,0 +1,70 @@
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def template_names(engine):
+    dirs = list(engine.engine.dirs)
+    if engine.engine.app_dirs or not dirs:
+        dirs.extend(get_app_template_dirs('templates'))
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/')
+
+
+def is_cached(engine):
+    return any(
+        isinstance(loader, CachedLoader)
+        for loader in engine.engine.template_loaders
+    )
+
+
+def compile_templates():
+    """Компилирует все шаблоны движков с кэширующим загрузчиком."""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates) or not is_cached(engine):
+            continue
+        for name in set(template_names(engine)):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                logger.warning('Template %s not compiled: %s', name, error)
+            else:
+                compiled += 1
+    return compiled
+
+
+def populate_resolvers(resolver=None):
+    """Заполняет таблицы reverse() для корневого и вложенных резолверов."""
+    resolver = resolver or get_resolver()
+    count = len(resolver.reverse_dict)
+    for _, nested in resolver.namespace_dict.values():
+        count += populate_resolvers(nested)
+    return count
+
+
+def warm_up():
+    started = time.perf_counter()
+    templates = compile_templates()
+    urls = populate_resolvers()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        'Warm-up: %d templates, %d url names in %.3fs',
+        templates, urls, elapsed,
+    )
+    return {'templates': templates, 'urls': urls, 'seconds': elapsed}
@@ -1,14 +1,90 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
 
+from core.paginator import EstimatedCountPaginator
+
+from . import moderation
 from .models import Comment, Follow, Group, Post
 
 
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='-пусто-',
+    )
+
+
 class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('move_to_group', 'delete_spam', 'purge_authors')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('text_html')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # Иначе list_editable читает список групп для каждой строки.
+            choices = getattr(request, 'group_choices', None)
+            if choices is None:
+                choices = request.group_choices = list(formfield.choices)
+            formfield.choices = choices
+        return formfield
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'apply' in request.POST
+                               else None)
+        if form.is_valid():
+            count = moderation.move_posts(
+                queryset, form.cleaned_data['group'])
+            self.message_user(request, f'Перенесено постов: {count}.')
+            return None
+        return TemplateResponse(
+            request,
+            'admin/posts/post/move_to_group.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Перенос в группу',
+                'opts': self.model._meta,
+                'form': form,
+                'count': queryset.count(),
+                'selected': request.POST.getlist(
+                    helpers.ACTION_CHECKBOX_NAME),
+                'select_across': request.POST.get('select_across') == '1',
+            },
+        )
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_spam(self, request, queryset):
+        count = moderation.delete_posts(queryset)
+        self.message_user(
+            request, f'Удалено постов вместе с комментариями: {count}.')
+    delete_spam.short_description = 'Удалить как спам'
+    delete_spam.allowed_permissions = ('delete',)
+
+    def purge_authors(self, request, queryset):
+        user_ids = set(queryset.values_list('author_id', flat=True))
+        posts, comments = moderation.purge_authors(user_ids)
+        self.message_user(
+            request,
+            f'Авторов: {len(user_ids)}, удалено постов: {posts}, '
+            f'комментариев: {comments}.',
+        )
+    purge_authors.short_description = 'Удалить всё, что написали авторы'
+    purge_authors.allowed_permissions = ('delete',)
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Prefetch, Subquery
+from django.shortcuts import get_object_or_404
+
+from core.cache import MISSING, LocalLRU
+
+from .models import Group, GroupAuthorStats, GroupStats, Post
+
+# Группы меняются редко, а group_posts запрашивает их на каждый просмотр.
+# Кэш живёт в памяти процесса; изменения из других воркеров видны
+# не позже GROUP_CACHE_TIMEOUT секунд.
+group_cache = LocalLRU(settings.GROUP_CACHE_SIZE,
+                       settings.GROUP_CACHE_TIMEOUT)
+
+
+def get_group(slug):
+    group = group_cache.get(slug)
+    if group is MISSING:
+        group = get_object_or_404(Group, slug=slug)
+        group_cache.set(slug, group)
+    return group
+
+
+def top_authors(limit=3):
+    """Prefetch для group.author_stats: только limit самых активных.
+
+    Подзапрос отбирает строки для каждой группы отдельно, так что
+    число загруженных строк не растёт с числом авторов группы.
+    """
+    top = (GroupAuthorStats.objects.filter(group_id=OuterRef('group_id'))
+           .order_by('-post_count', 'pk').values('pk')[:limit])
+    return Prefetch(
+        'author_stats',
+        queryset=(GroupAuthorStats.objects.filter(pk__in=Subquery(top))
+                  .select_related('author').order_by('-post_count', 'pk')),
+    )
+
+
+def post_added(group_id, author_id, pub_date):
+    with transaction.atomic():
+        stats, _ = (GroupStats.objects.select_for_update()
+                    .get_or_create(group_id=group_id))
+        if stats.last_post_at is None or pub_date > stats.last_post_at:
+            stats.last_post_at = pub_date
+        stats.post_count = F('post_count') + 1
+        stats.save()
+        author_stats, _ = GroupAuthorStats.objects.get_or_create(
+            group_id=group_id, author_id=author_id)
+        GroupAuthorStats.objects.filter(pk=author_stats.pk).update(
+            post_count=F('post_count') + 1)
+
+
+def post_removed(group_id, author_id):
+    with transaction.atomic():
+        last_post_at = (Post.objects.filter(group_id=group_id)
+                        .aggregate(last=Max('pub_date'))['last'])
+        GroupStats.objects.filter(group_id=group_id).update(
+            post_count=F('post_count') - 1, last_post_at=last_post_at)
+        author_stats = GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id)
+        author_stats.update(post_count=F('post_count') - 1)
+        author_stats.filter(post_count=0).delete()
+
+
+def rebuild_stats(group_ids):
+    """Пересчитывает агрегаты групп заново после пакетных изменений."""
+    group_ids = list(group_ids)
+    posts = Post.objects.filter(group_id__in=group_ids).order_by()
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id__in=group_ids).delete()
+        GroupAuthorStats.objects.filter(group_id__in=group_ids).delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=row['group_id'],
+                post_count=row['post_count'],
+                last_post_at=row['last_post_at'],
+            )
+            for row in posts.values('group_id').annotate(
+                post_count=Count('pk'), last_post_at=Max('pub_date'))
+        )
+        GroupAuthorStats.objects.bulk_create(
+            GroupAuthorStats(
+                group_id=row['group_id'],
+                author_id=row['author_id'],
+                post_count=row['post_count'],
+            )
+            for row in posts.values('group_id', 'author_id').annotate(
+                post_count=Count('pk'))
+        )
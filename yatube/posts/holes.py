@@ -0,0 +1,54 @@
+from django.template.loader import render_to_string
+
+from core.holes import hole
+
+from . import recommendations
+from .forms import CommentForm
+from .models import Follow
+
+
+@hole('follow_tab')
+def follow_tab(request, view_name):
+    return render_to_string(
+        'posts/includes/follow_tab.html', {'view_name': view_name},
+        request=request)
+
+
+@hole('follow_button')
+def follow_button(request, author_id, username):
+    user = request.user
+    if not user.is_authenticated or user.pk == author_id:
+        return ''
+    following = Follow.objects.filter(user=user, author_id=author_id).exists()
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request=request)
+
+
+@hole('recommendations')
+def user_recommendations(request):
+    return render_to_string(
+        'posts/includes/recommendations.html',
+        {'recommendations': recommendations.for_user(request.user)},
+        request=request)
+
+
+@hole('post_edit_link')
+def post_edit_link(request, post_id, author_id):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'posts/includes/post_edit_link.html', {'post_id': post_id},
+        request=request)
+
+
+# В форме CSRF-токен сессии, поэтому она не кэшируется.
+@hole('comment_form', cached=False)
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request)
@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 40
+PALETTE_SIZE = 8
+
+
+def describe(file):
+    """Размеры, основной цвет и крошечное превью (LQIP) картинки.
+
+    Превью -- JPEG шириной PLACEHOLDER_WIDTH в виде data URI: его
+    показывают размытым фоном, пока грузится миниатюра.
+    """
+    with Image.open(file) as image:
+        width, height = image.size
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+        small = image.convert('RGB')
+        small.thumbnail((PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+    palette = small.quantize(PALETTE_SIZE)
+    _, index = max(palette.getcolors())
+    color = '#{:02x}{:02x}{:02x}'.format(
+        *palette.getpalette()[index * 3:index * 3 + 3])
+    small.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = io.BytesIO()
+    small.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()).decode()
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_color': color,
+        'image_placeholder': placeholder,
+    }
+
+
+def describe_path(path):
+    """describe() для файла на диске; None, если его нельзя прочитать."""
+    try:
+        return describe(path)
+    except OSError:
+        return None
+
+
+def is_published(name):
+    """Отдавать ли оригинал: файлы удалённых постов не отдаются."""
+    from .models import Post
+
+    return Post.objects.filter(image=name).exists()
+
+
+def file_digest(path):
+    """SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def optimize(path, max_size, max_bytes, quality):
+    """Пережимает картинку больше потолка во временный файл рядом с ней.
+
+    JPEG уменьшается до max_size по большей стороне и сохраняется с
+    качеством quality, PNG и статичный GIF только уменьшаются.
+    Возвращает путь временного файла или None, если картинка уже
+    укладывается в потолок, не поддерживается или меньше не стала.
+    """
+    size = os.path.getsize(path)
+    with Image.open(path) as image:
+        format_ = image.format
+        if (format_ not in ('JPEG', 'PNG', 'GIF')
+                or getattr(image, 'n_frames', 1) > 1
+                or max(image.size) <= max_size and size <= max_bytes):
+            return None
+        params = {'optimize': True}
+        if image.info.get('icc_profile'):
+            params['icc_profile'] = image.info['icc_profile']
+        if format_ == 'JPEG':
+            image.draft('RGB', (max_size, max_size))
+            params.update(quality=quality, progressive=True)
+        # Поворот по EXIF применяется к пикселям: EXIF не сохраняется.
+        result = ImageOps.exif_transpose(image)
+        if format_ == 'GIF':
+            params.pop('optimize')
+            if 'transparency' in image.info:
+                params['transparency'] = image.info['transparency']
+    result.thumbnail((max_size, max_size), Image.LANCZOS)
+    fd, temp = tempfile.mkstemp(
+        suffix='.tmp', dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as file:
+        result.save(file, format_, **params)
+    if os.path.getsize(temp) >= size:
+        os.remove(temp)
+        return None
+    return temp
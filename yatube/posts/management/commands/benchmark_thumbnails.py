@@ -0,0 +1,85 @@
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from PIL import Image
+from sorl.thumbnail.engines import pil_engine
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from posts import thumbnail_engine, thumbnails
+
+
+class StockEngine(pil_engine.Engine):
+    """Исходный движок sorl: Image.ANTIALIAS в Pillow 10 стал LANCZOS."""
+
+    def _scale(self, image, width, height):
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+ENGINES = {
+    'sorl': StockEngine,
+    'draft': thumbnail_engine.Engine,
+}
+
+
+def run(engine_class, root, names, runs):
+    """Строит миниатюры в отдельном процессе: время и прирост пикового RSS."""
+    engine = engine_class()
+    storage = FileSystemStorage(location=root)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        for name in names:
+            source = ImageFile(name, storage)
+            options = thumbnails.thumbnail_options(source)
+            image = engine.get_image(source)
+            options['image_info'] = engine.get_image_info(image)
+            geometry = parse_geometry(
+                thumbnails.GEOMETRY, engine.get_image_ratio(image, options))
+            image = engine.create(image, geometry, options)
+            size += len(engine._get_raw_data(
+                image, options['format'], options['quality'],
+                image_info=options['image_info']))
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return elapsed, peak, size // runs
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает построение миниатюр исходным движком sorl '
+            'и posts.thumbnail_engine на картинках из media/posts')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.MEDIA_ROOT, 'posts'))
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument(
+            '--jpeg', action='store_true', help='Только JPEG-файлы')
+
+    def handle(self, *args, **options):
+        root = options['path']
+        extensions = ('.jpg', '.jpeg') if options['jpeg'] else (
+            '.jpg', '.jpeg', '.png', '.gif')
+        names = sorted(
+            name for name in os.listdir(root)
+            if name.lower().endswith(extensions)
+        )
+        self.stdout.write(f'Картинок: {len(names)}, прогонов: '
+                          f'{options["runs"]}')
+        for label, engine_class in ENGINES.items():
+            # Новый процесс на каждый движок, чтобы пик памяти
+            # одного не прятал пик другого.
+            with ProcessPoolExecutor(1) as executor:
+                elapsed, peak, size = executor.submit(
+                    run, engine_class, root, names, options['runs']).result()
+            per_image = elapsed / (len(names) * options['runs'] or 1)
+            self.stdout.write(
+                '{}: {:.1f} ms на картинку, пик памяти +{} KB, '
+                'миниатюры {} KB'.format(
+                    label, per_image * 1000, peak, size // 1024))
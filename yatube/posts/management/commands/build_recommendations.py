@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import rebuild
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации авторов для всех пользователей '
+            'по подпискам, комментариям и группам')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.RECOMMENDATIONS_TOP)
+
+    def handle(self, *args, **options):
+        count = rebuild(top=options['top'])
+        self.stdout.write(f'Сохранено рекомендаций: {count}')
@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.images import describe_path
+from posts.models import EMPTY_IMAGE_INFO, Post
+
+FIELDS = list(EMPTY_IMAGE_INFO)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, цвет и превью картинок постов, '
+            'загруженных до появления этих полей')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все картинки, а не только незаполненные')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('pk', 'image')
+        if not options['all']:
+            posts = posts.filter(image_width__isnull=True)
+        posts = posts.order_by('pk')
+        described = missing = 0
+        last_pk = 0
+        with ProcessPoolExecutor(options['workers']) as executor:
+            while True:
+                batch = list(posts.filter(pk__gt=last_pk)
+                             [:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                infos = executor.map(
+                    describe_path, [post.image.path for post in batch],
+                    chunksize=8)
+                updated = []
+                for post, info in zip(batch, infos):
+                    if info is None:
+                        missing += 1
+                        continue
+                    post.set_image_info(info)
+                    updated.append(post)
+                Post.objects.bulk_update(updated, FIELDS)
+                described += len(updated)
+                self.stdout.write(f'Обработано картинок: {described}')
+        self.stdout.write(
+            f'Готово: {described}, не удалось прочитать: {missing}')
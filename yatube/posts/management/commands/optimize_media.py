@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import pages, sitemaps
+from posts.images import describe, file_digest, optimize
+from posts.models import Post
+from posts.moderation import delete_images
+
+logger = logging.getLogger(__name__)
+
+# Хэши уже обработанных файлов в процессе-воркере.
+_known = frozenset()
+
+
+def init_worker(known):
+    global _known
+    _known = frozenset(known)
+
+
+def optimize_path(path, max_size, max_bytes, quality):
+    """Выполняется в воркере: (хэш исходника, временный файл, размеры).
+
+    Битая картинка или картинка-бомба (DecompressionBombError)
+    пропускается: иначе её ошибка из executor.map прервала бы весь проход.
+    """
+    try:
+        digest = file_digest(path)
+        if digest in _known:
+            return digest, None, None, None
+        temp = optimize(path, max_size, max_bytes, quality)
+    except Exception:
+        logger.exception('Failed to optimize %s', path)
+        return None, None, None, None
+    if temp is None:
+        return digest, None, None, None
+    return digest, temp, file_digest(temp), describe(temp)
+
+
+def load_state(path):
+    try:
+        with open(path) as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        state = {}
+    return {
+        'last_pk': state.get('last_pk', 0),
+        'digests': set(state.get('digests', [])),
+    }
+
+
+def save_state(path, state):
+    temp = path + '.tmp'
+    with open(temp, 'w') as file:
+        json.dump({
+            'last_pk': state['last_pk'],
+            'digests': sorted(state['digests']),
+        }, file)
+    os.replace(temp, path)
+
+
+def replace_image(post, temp, info):
+    """Подменяет картинку поста, если её не успели поменять с момента чтения.
+
+    Новый файл получает новое имя: по старому в кэшах браузеров и
+    sorl-thumbnail остаются прежние данные. Старый файл с миниатюрами
+    удаляется после коммита.
+    """
+    old_name = post.image.name
+    new_name = default_storage.get_available_name(old_name)
+    os.replace(temp, default_storage.path(new_name))
+    with transaction.atomic():
+        updated = Post.objects.filter(pk=post.pk, image=old_name).update(
+            image=new_name, **info)
+        if updated:
+            transaction.on_commit(lambda: delete_images([old_name]))
+    if not updated:
+        default_storage.delete(new_name)
+        return False
+    # Миниатюры старого файла удалены: страницы, где они выводились,
+    # перерисовываются.
+    sitemaps.touch('posts', post.pk)
+    sitemaps.touch('profiles', post.author_id)
+    if post.group_id is not None:
+        sitemaps.touch('groups', post.group_id)
+    pages.touch('index', 0)
+    return True
+
+
+class Command(BaseCommand):
+    help = ('Пережимает и уменьшает картинки постов больше '
+            'MEDIA_OPTIMIZE_MAX_SIZE точек или MEDIA_OPTIMIZE_MAX_BYTES байт')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--state', default=settings.MEDIA_OPTIMIZE_STATE,
+            help='Файл с прогрессом и хэшами обработанных картинок')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первого поста, а не с места остановки')
+
+    def handle(self, *args, **options):
+        state = load_state(options['state'])
+        if options['restart']:
+            state['last_pk'] = 0
+        posts = (Post.objects.exclude(image='')
+                 .only('pk', 'image', 'author_id', 'group_id')
+                 .order_by('pk'))
+        limits = (settings.MEDIA_OPTIMIZE_MAX_SIZE,
+                  settings.MEDIA_OPTIMIZE_MAX_BYTES,
+                  settings.MEDIA_OPTIMIZE_QUALITY)
+        optimized = saved = 0
+        with ProcessPoolExecutor(
+                options['workers'],
+                initializer=init_worker,
+                initargs=(state['digests'],)) as executor:
+            while True:
+                batch = list(posts.filter(pk__gt=state['last_pk'])
+                             [:options['batch_size']])
+                if not batch:
+                    break
+                results = executor.map(
+                    optimize_path,
+                    [post.image.path for post in batch],
+                    *([limit] * len(batch) for limit in limits),
+                    chunksize=8,
+                )
+                for post, (digest, temp, new_digest, info) in zip(
+                        batch, results):
+                    if digest is None:
+                        continue
+                    if temp is None:
+                        state['digests'].add(digest)
+                        continue
+                    before = post.image.size
+                    after = os.path.getsize(temp)
+                    if replace_image(post, temp, info):
+                        optimized += 1
+                        saved += before - after
+                        state['digests'].add(new_digest)
+                state['last_pk'] = batch[-1].pk
+                save_state(options['state'], state)
+                self.stdout.write(
+                    f'До поста {state["last_pk"]}: пережато {optimized}, '
+                    f'сэкономлено {saved // 1024} KB')
+        state['last_pk'] = 0
+        save_state(options['state'], state)
+        self.stdout.write(
+            f'Готово: пережато картинок {optimized}, '
+            f'сэкономлено {saved // 1024} KB')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import snapshots
+
+
+class Command(BaseCommand):
+    help = ('Перерисовывает снимки страниц для анонимов из очереди '
+            'SNAPSHOT_QUEUE_DIR в SNAPSHOT_ROOT; с --interval работает как '
+            'фоновый воркер. Запускайте один воркер на очередь.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Поставить в очередь все страницы перед проходом.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Пауза между проходами в секундах; 0 -- один проход.',
+        )
+
+    def handle(self, *args, **options):
+        if not snapshots.enabled():
+            raise CommandError('SNAPSHOT_ROOT не задан')
+        if options['all']:
+            snapshots.enqueue_all()
+        publisher = snapshots.Publisher()
+        while True:
+            processed = publisher.drain()
+            if processed:
+                self.stdout.write(f'Обработано снимков: {processed}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post, render_text
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает готовый HTML и выдержку постов и комментариев, '
+            'сохранённых в обход save() (loaddata, update()): '
+            'перезаписываются записи, где они не совпадают с текстом')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перезаписать все записи, а не только устаревшие')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            objects = model.objects.only(
+                'pk', 'text', 'text_html', 'excerpt').order_by('pk')
+            count = 0
+            last_pk = 0
+            while True:
+                batch = list(objects.filter(pk__gt=last_pk)
+                             [:options['batch_size']])
+                if not batch:
+                    break
+                stale = []
+                for obj in batch:
+                    rendered = render_text(obj.text)
+                    if options['all'] or rendered != (obj.text_html,
+                                                      obj.excerpt):
+                        obj.text_html, obj.excerpt = rendered
+                        stale.append(obj)
+                model.objects.bulk_update(stale, ['text_html', 'excerpt'])
+                count += len(stale)
+                last_pk = batch[-1].pk
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {count}')
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:44
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+def fill_trending_score(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    rate = math.log(2) / settings.TRENDING_HALF_LIFE.total_seconds()
+
+    def score(when, weight=1.0):
+        return (when - EPOCH).total_seconds() * rate + math.log(weight)
+
+    scores = {
+        pk: score(pub_date, settings.TRENDING_POST_WEIGHT)
+        for pk, pub_date in Post.objects.values_list('pk', 'pub_date')
+    }
+    for post_id, created in Comment.objects.values_list('post_id', 'created'):
+        first, second = scores[post_id], score(created)
+        high, low = max(first, second), min(first, second)
+        scores[post_id] = high + math.log1p(math.exp(low - high))
+    for pk, value in scores.items():
+        Post.objects.filter(pk=pk).update(trending_score=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_trending_score, migrations.RunPython.noop),
+    ]
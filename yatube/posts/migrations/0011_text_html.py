@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:54
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+def fill_text_html(apps, schema_editor):
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        batch = []
+        for obj in model.objects.only('pk', 'text').iterator():
+            obj.text_html = str(linebreaksbr(obj.text, autoescape=True))
+            obj.excerpt = Truncator(obj.text).chars(30)
+            batch.append(obj)
+            if len(batch) == 500:
+                model.objects.bulk_update(batch, ['text_html', 'excerpt'])
+                batch = []
+        model.objects.bulk_update(batch, ['text_html', 'excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=30, verbose_name='Выдержка'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, max_length=30, verbose_name='Выдержка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_text_html, migrations.RunPython.noop),
+    ]
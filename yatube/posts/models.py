@@ -1,8 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from .images import describe
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 30
+
+EMPTY_IMAGE_INFO = {
+    'image_width': None,
+    'image_height': None,
+    'image_color': '',
+    'image_placeholder': '',
+}
+
+
+def render_text(text):
+    """HTML текста (как фильтр linebreaksbr) и короткая выдержка."""
+    html = str(linebreaksbr(text, autoescape=True))
+    return html, Truncator(text).chars(EXCERPT_LENGTH)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -31,12 +50,51 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        blank=True,
+        db_index=True,
+    )
+    # Заполняются при загрузке (и командой describe_images), чтобы
+    # шаблонам не приходилось открывать файл ради размеров.
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    image_color = models.CharField(
+        max_length=7, blank=True, default='', editable=False)
+    image_placeholder = models.TextField(
+        blank=True, default='', editable=False)
+    trending_score = models.FloatField(
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+    text_html = models.TextField(default='', editable=False)
+    excerpt = models.CharField(
+        'Выдержка',
+        max_length=EXCERPT_LENGTH,
+        default='',
+        editable=False,
     )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html, self.excerpt = render_text(self.text)
+        if not self.image:
+            self.set_image_info(EMPTY_IMAGE_INFO)
+        elif not self.image._committed:
+            try:
+                self.set_image_info(describe(self.image.file))
+            except OSError:
+                self.set_image_info(EMPTY_IMAGE_INFO)
+            self.image.file.seek(0)
+        super().save(*args, **kwargs)
+
+    def set_image_info(self, info):
+        for name, value in info.items():
+            setattr(self, name, value)
+
     class Meta:
         ordering = ('-pub_date',)
 
@@ -58,10 +116,21 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    text_html = models.TextField(default='', editable=False)
+    excerpt = models.CharField(
+        'Выдержка',
+        max_length=EXCERPT_LENGTH,
+        default='',
+        editable=False,
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html, self.excerpt = render_text(self.text)
+        super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -80,3 +149,62 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['follower', 'following'],
                                     name='follow_unique'),
         ]
+
+
+class Recommendation(models.Model):
+    """Предложение подписаться, посчитанное build_recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='recommendation_user_score'),
+        ]
+
+
+class GroupStats(models.Model):
+    """Агрегаты группы, обновляются при сохранении и удалении постов."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(null=True, blank=True)
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ('-post_count',)
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'author'],
+                                    name='group_author_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['group', '-post_count'],
+                         name='group_author_post_count'),
+        ]
@@ -0,0 +1,119 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from sorl.thumbnail import delete as delete_image
+
+from . import groups, pages, sitemaps
+from .models import Comment, Post
+from .signals import suspended
+
+logger = logging.getLogger(__name__)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def log_progress(action, done, total):
+    logger.info('%s: %d/%d', action, done, total)
+
+
+def move_posts(queryset, group, chunk_size=None, progress=log_progress):
+    """Переносит посты в группу (или убирает из групп, если group=None).
+
+    Один UPDATE на кусок постов; агрегаты затронутых групп
+    пересчитываются в конце. Сбрасываются страницы групп, самих постов,
+    их авторов и главная: везде выводится группа поста.
+    """
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    rows = list(queryset.order_by().values_list(
+        'pk', 'group_id', 'author_id'))
+    pks = [pk for pk, _, _ in rows]
+    group_ids = {group_id for _, group_id, _ in rows if group_id is not None}
+    author_ids = {author_id for _, _, author_id in rows}
+    if group is not None:
+        group_ids.add(group.pk)
+    done = 0
+    for chunk in chunks(pks, chunk_size):
+        Post.objects.filter(pk__in=chunk).update(group=group)
+        done += len(chunk)
+        progress('move_posts', done, len(pks))
+    groups.rebuild_stats(group_ids)
+    for group_id in group_ids:
+        sitemaps.touch('groups', group_id)
+    for author_id in author_ids:
+        sitemaps.touch('profiles', author_id)
+    for pk in pks:
+        pages.touch('posts', pk)
+    pages.touch('index', 0)
+    return len(pks)
+
+
+def delete_posts(queryset, chunk_size=None, progress=log_progress):
+    """Удаляет посты вместе с комментариями, картинками и миниатюрами.
+
+    Каждый кусок удаляется в своей транзакции, чтобы не держать
+    блокировку всё время операции; файлы стираются после коммита.
+    Сбрасываются страницы затронутых групп и авторов и главная.
+    """
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    rows = list(queryset.order_by().values_list(
+        'pk', 'group_id', 'author_id', 'image'))
+    pks = [pk for pk, _, _, _ in rows]
+    group_ids = {
+        group_id for _, group_id, _, _ in rows if group_id is not None}
+    author_ids = {author_id for _, _, author_id, _ in rows}
+    images = {pk: image for pk, _, _, image in rows if image}
+    done = 0
+    for chunk in chunks(pks, chunk_size):
+        with suspended(), transaction.atomic():
+            Comment.objects.filter(post_id__in=chunk).delete()
+            Post.objects.filter(pk__in=chunk).delete()
+            names = [images[pk] for pk in chunk if pk in images]
+            transaction.on_commit(lambda names=names: delete_images(names))
+        done += len(chunk)
+        progress('delete_posts', done, len(pks))
+    groups.rebuild_stats(group_ids)
+    # Куски карты постов сдвигаются; группы и авторы остаются на месте.
+    sitemaps.touch_all('posts')
+    for pk in pks:
+        pages.touch('posts', pk)
+    for group_id in group_ids:
+        sitemaps.touch('groups', group_id)
+    for author_id in author_ids:
+        sitemaps.touch('profiles', author_id)
+    pages.touch('index', 0)
+    return len(pks)
+
+
+def purge_authors(user_ids, chunk_size=None, progress=log_progress):
+    """Удаляет все посты и комментарии пользователей.
+
+    Возвращает пару (удалено постов, удалено комментариев к чужим постам).
+    """
+    chunk_size = chunk_size or settings.MODERATION_CHUNK_SIZE
+    user_ids = list(user_ids)
+    posts = delete_posts(
+        Post.objects.filter(author_id__in=user_ids), chunk_size, progress)
+    rows = list(Comment.objects.filter(author_id__in=user_ids)
+                .order_by().values_list('pk', 'post_id'))
+    pks = [pk for pk, _ in rows]
+    done = 0
+    for chunk in chunks(pks, chunk_size):
+        with suspended():
+            Comment.objects.filter(pk__in=chunk).delete()
+        done += len(chunk)
+        progress('purge_comments', done, len(pks))
+    for post_id in {post_id for _, post_id in rows}:
+        sitemaps.touch('posts', post_id)
+    return posts, len(pks)
+
+
+def delete_images(names):
+    for name in names:
+        try:
+            delete_image(name)
+        except OSError:
+            logger.exception('Failed to delete image %s', name)
@@ -0,0 +1,42 @@
+import uuid
+
+from django.core.cache import cache
+
+from . import snapshots
+
+PAGE_VERSION_KEY = 'page:version:{section}:{pk}'
+
+
+def versions(*objects):
+    """Версии страниц объектов [(section, pk), ..] для ключа кэша.
+
+    К версии объекта добавляется версия всего раздела: touch_all
+    сбрасывает разом все страницы раздела. Пропавшие из кэша версии
+    создаются заново.
+    """
+    keys = []
+    for section, pk in objects:
+        keys.append(PAGE_VERSION_KEY.format(section=section, pk='all'))
+        keys.append(PAGE_VERSION_KEY.format(section=section, pk=pk))
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def touch(section, pk):
+    """Страницы объекта устарели: их закэшированные копии не читаются.
+
+    Снимок страницы для анонимов ставится в очередь (posts.snapshots).
+    Главная -- ('index', 0) -- сбрасывается отдельно, только когда
+    меняются сами посты: комментарии на ней не выводятся.
+    """
+    cache.set(PAGE_VERSION_KEY.format(section=section, pk=pk),
+              uuid.uuid4().hex, timeout=None)
+    snapshots.enqueue(section, pk)
+
+
+def touch_all(section):
+    touch(section, 'all')
@@ -0,0 +1,132 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .models import Comment, Follow, Post, Recommendation
+
+FRIEND_OF_FRIEND_WEIGHT = 3.0
+COMMENTED_AUTHOR_WEIGHT = 2.0
+CO_COMMENTER_WEIGHT = 1.0
+GROUP_OVERLAP_WEIGHT = 0.5
+
+# Самые обсуждаемые посты и большие группы дают квадратичное число пар;
+# берём только первых участников, этого хватает для сигнала.
+MAX_COMMENTERS_PER_POST = 50
+MAX_AUTHORS_PER_GROUP = 200
+
+
+def load_following():
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        following[user_id].add(author_id)
+    return following
+
+
+def load_comments():
+    """Списки смежности: пост -> комментаторы, пост -> автор."""
+    commenters = defaultdict(list)
+    for post_id, user_id in (Comment.objects
+                             .order_by('post_id', 'created')
+                             .values_list('post_id', 'author_id')
+                             .iterator()):
+        users = commenters[post_id]
+        if len(users) < MAX_COMMENTERS_PER_POST and user_id not in users:
+            users.append(user_id)
+    post_authors = dict(
+        Post.objects
+        .filter(pk__in=Comment.objects.values('post_id'))
+        .order_by()
+        .values_list('pk', 'author_id').iterator()
+    )
+    return commenters, post_authors
+
+
+def load_groups():
+    """Списки смежности: группа -> авторы, автор -> группы."""
+    post_counts = Counter(
+        (group_id, author_id)
+        for group_id, author_id in Post.objects
+        .filter(group__isnull=False)
+        .order_by()
+        .values_list('group_id', 'author_id').iterator()
+    )
+    group_authors = defaultdict(list)
+    for (group_id, author_id), _ in post_counts.most_common():
+        authors = group_authors[group_id]
+        if len(authors) < MAX_AUTHORS_PER_GROUP:
+            authors.append(author_id)
+    author_groups = defaultdict(set)
+    for group_id, authors in group_authors.items():
+        for author_id in authors:
+            author_groups[author_id].add(group_id)
+    return group_authors, author_groups
+
+
+def add_friends_of_friends(scores, following):
+    for user_id, authors in following.items():
+        for author_id in authors:
+            for candidate in following.get(author_id, ()):
+                scores[user_id][candidate] += FRIEND_OF_FRIEND_WEIGHT
+
+
+def add_comment_affinity(scores, commenters, post_authors):
+    for post_id, users in commenters.items():
+        author_id = post_authors.get(post_id)
+        for user_id in users:
+            if author_id is not None:
+                scores[user_id][author_id] += COMMENTED_AUTHOR_WEIGHT
+            for other_id in users:
+                scores[user_id][other_id] += CO_COMMENTER_WEIGHT
+
+
+def add_group_overlap(scores, group_authors, author_groups):
+    for user_id, groups in author_groups.items():
+        for group_id in groups:
+            for candidate in group_authors[group_id]:
+                scores[user_id][candidate] += GROUP_OVERLAP_WEIGHT
+
+
+def score_candidates():
+    """Очки кандидатов для каждого пользователя: user -> Counter(author)."""
+    following = load_following()
+    scores = defaultdict(Counter)
+    add_friends_of_friends(scores, following)
+    add_comment_affinity(scores, *load_comments())
+    add_group_overlap(scores, *load_groups())
+    for user_id, candidates in scores.items():
+        candidates.pop(user_id, None)
+        for author_id in following.get(user_id, ()):
+            candidates.pop(author_id, None)
+    return scores
+
+
+def top_recommendations(scores, top):
+    for user_id, candidates in scores.items():
+        best = heapq.nlargest(top, candidates.items(), key=lambda x: x[1])
+        for author_id, score in best:
+            yield Recommendation(user_id=user_id, author_id=author_id,
+                                 score=score)
+
+
+def rebuild(top=10, batch_size=1000):
+    """Пересчитывает рекомендации всех пользователей; возвращает их число."""
+    recommendations = list(top_recommendations(score_candidates(), top))
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(
+            recommendations, batch_size=batch_size)
+    return len(recommendations)
+
+
+def for_user(user, limit=5):
+    """Одно чтение по индексу (user, -score) вместе с авторами."""
+    if not user.is_authenticated:
+        return []
+    return list(
+        Recommendation.objects
+        .filter(user=user)
+        .select_related('author')
+        .order_by('-score')[:limit]
+    )
@@ -0,0 +1,146 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import holes
+
+from . import groups, pages, sitemaps, trending
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Отключает обработчики этого модуля в текущем потоке.
+
+    Пакетные операции (posts.moderation) меняют тысячи строк и сами
+    пересчитывают агрегаты и карту сайта один раз в конце.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def unless_suspended(handler):
+    @wraps(handler)
+    def wrapper(sender, **kwargs):
+        if not getattr(_state, 'suspended', False):
+            handler(sender, **kwargs)
+    return wrapper
+
+
+@receiver(post_save, sender=Post)
+@unless_suspended
+def post_saved(sender, instance, **kwargs):
+    sitemaps.touch('posts', instance.pk)
+    pages.touch('index', 0)
+    sitemaps.touch('profiles', instance.author_id)
+    if instance.group_id is not None:
+        sitemaps.touch('groups', instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+@unless_suspended
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        instance.trending_score = trending.initial_score(instance)
+        Post.objects.filter(pk=instance.pk).update(
+            trending_score=instance.trending_score)
+
+
+@receiver(pre_save, sender=Post)
+@unless_suspended
+def remember_group(sender, instance, **kwargs):
+    instance.previous_group_id = None
+    if instance.pk is not None:
+        instance.previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+@unless_suspended
+def update_group_stats(sender, instance, created, **kwargs):
+    previous = instance.previous_group_id
+    if previous == instance.group_id:
+        return
+    if previous is not None:
+        groups.post_removed(previous, instance.author_id)
+        pages.touch('groups', previous)
+    if instance.group_id is not None:
+        groups.post_added(
+            instance.group_id, instance.author_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Post)
+@unless_suspended
+def post_deleted(sender, instance, **kwargs):
+    sitemaps.touch_all('posts')
+    pages.touch('posts', instance.pk)
+    pages.touch('index', 0)
+    sitemaps.touch('profiles', instance.author_id)
+    if instance.group_id is not None:
+        sitemaps.touch('groups', instance.group_id)
+        groups.post_removed(instance.group_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@unless_suspended
+def comment_changed(sender, instance, **kwargs):
+    sitemaps.touch('posts', instance.post_id)
+
+
+@receiver(post_save, sender=Comment)
+@unless_suspended
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        trending.bump(instance.post_id, instance.created)
+
+
+@receiver(post_save, sender=Group)
+@unless_suspended
+def group_saved(sender, instance, **kwargs):
+    sitemaps.touch('groups', instance.pk)
+    groups.group_cache.clear()
+
+
+@receiver(post_delete, sender=Group)
+@unless_suspended
+def group_deleted(sender, instance, **kwargs):
+    sitemaps.touch_all('groups')
+    pages.touch('groups', instance.pk)
+    groups.group_cache.clear()
+
+
+@receiver(post_save, sender=User)
+@unless_suspended
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'username' in update_fields:
+        sitemaps.touch('profiles', instance.pk)
+        holes.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@unless_suspended
+def user_deleted(sender, instance, **kwargs):
+    sitemaps.touch_all('profiles')
+    pages.touch('profiles', instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@unless_suspended
+def follow_changed(sender, instance, **kwargs):
+    holes.invalidate_user(instance.user_id)
@@ -0,0 +1,137 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sitemaps import Sitemap
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.urls import reverse
+
+from . import pages
+from .models import Group, Post
+
+User = get_user_model()
+
+SITEMAP_VERSION_KEY = 'sitemap:version:{section}:{chunk}'
+
+
+class ChunkedSitemap(Sitemap):
+    """Карта сайта, разбитая на куски фиксированного размера.
+
+    Элементы упорядочены по pk, поэтому новые объекты попадают
+    в последний кусок и не сдвигают уже закэшированные.
+    """
+    section = None
+
+    @property
+    def limit(self):
+        return settings.SITEMAP_CHUNK_SIZE
+
+    @property
+    def paginator(self):
+        # Аннотированный queryset считается через GROUP BY,
+        # а число строк совпадает с размером таблицы.
+        paginator = Paginator(self.items(), self.limit)
+        paginator.count = self.items().model.objects.count()
+        return paginator
+
+    def chunk_of(self, pk):
+        model = self.items().model
+        position = model.objects.filter(pk__lt=pk).count()
+        return position // self.limit + 1
+
+
+class PostSitemap(ChunkedSitemap):
+    section = 'posts'
+
+    def items(self):
+        return (Post.objects
+                .only('pk', 'pub_date')
+                .annotate(last_comment=Max('comments__created'))
+                .order_by('pk'))
+
+    def lastmod(self, obj):
+        if obj.last_comment is None:
+            return obj.pub_date
+        return max(obj.pub_date, obj.last_comment)
+
+    def location(self, obj):
+        return reverse('posts:post_detail', args=(obj.pk,))
+
+
+class GroupSitemap(ChunkedSitemap):
+    section = 'groups'
+
+    def items(self):
+        return (Group.objects
+                .only('pk', 'slug')
+                .annotate(last_post=Max('posts__pub_date'))
+                .order_by('pk'))
+
+    def lastmod(self, obj):
+        return obj.last_post
+
+    def location(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+
+class ProfileSitemap(ChunkedSitemap):
+    section = 'profiles'
+
+    def items(self):
+        return (User.objects
+                .only('pk', 'username', 'date_joined')
+                .annotate(last_post=Max('posts__pub_date'))
+                .order_by('pk'))
+
+    def lastmod(self, obj):
+        return obj.last_post or obj.date_joined
+
+    def location(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+
+sitemaps = {
+    PostSitemap.section: PostSitemap,
+    GroupSitemap.section: GroupSitemap,
+    ProfileSitemap.section: ProfileSitemap,
+}
+
+
+def chunk_version(section, chunk):
+    """Текущая версия куска; пропавшая из кэша версия создаётся заново."""
+    return cache.get_or_set(
+        SITEMAP_VERSION_KEY.format(section=section, chunk=chunk),
+        uuid.uuid4().hex,
+        timeout=None,
+    )
+
+
+def touch_chunk(section, chunk):
+    cache.set(
+        SITEMAP_VERSION_KEY.format(section=section, chunk=chunk),
+        uuid.uuid4().hex,
+        timeout=None,
+    )
+
+
+def touch(section, pk):
+    """Помечает устаревшим кусок карты, в который входит объект с pk.
+
+    Заодно устаревают закэшированные страницы объекта (posts.pages).
+    """
+    pages.touch(section, pk)
+    sitemap = sitemaps[section]()
+    touch_chunk(section, sitemap.chunk_of(pk))
+
+
+def touch_all(section):
+    """Сбрасывает все куски раздела (после удаления объекты сдвигаются).
+
+    Страницы объектов остаются в кэше: удалённый объект сбрасывается
+    отдельно через pages.touch.
+    """
+    sitemap = sitemaps[section]()
+    for chunk in range(1, sitemap.paginator.num_pages + 2):
+        touch_chunk(section, chunk)
@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from core.compression import compress
+
+from .groups import group_cache
+from .models import Group, Post
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+SUFFIX = '.todo'
+MANIFEST = 'manifest.json'
+INDEX = 'index.html'
+
+
+def enabled():
+    return bool(settings.SNAPSHOT_ROOT)
+
+
+def enqueue(section, pk):
+    """Ставит в очередь перепубликацию снимка страницы объекта.
+
+    Очередь -- каталог SNAPSHOT_QUEUE_DIR с пустым файлом на объект,
+    так что повторные изменения до прохода публикатора схлопываются.
+    Файл появляется после коммита: публикатор не увидит старые данные.
+    pk='all' значит, что устарели все страницы раздела.
+    """
+    if not enabled():
+        return
+
+    def write():
+        os.makedirs(settings.SNAPSHOT_QUEUE_DIR, exist_ok=True)
+        path = os.path.join(settings.SNAPSHOT_QUEUE_DIR,
+                            f'{section}-{pk}{SUFFIX}')
+        open(path, 'w').close()
+    transaction.on_commit(write)
+
+
+def queued_paths(queue_dir):
+    try:
+        names = sorted(os.listdir(queue_dir))
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(queue_dir, name) for name in names
+        if name.endswith(SUFFIX) and not name.startswith('.')
+    ]
+
+
+def url_for(section, pk):
+    """URL страницы объекта или None, если объекта больше нет."""
+    if section == 'index':
+        return reverse('posts:index')
+    if section == 'posts':
+        return reverse('posts:post_detail', kwargs={'post_id': pk})
+    if section == 'profiles':
+        username = User.objects.filter(pk=pk).values_list(
+            'username', flat=True).first()
+        return username and reverse(
+            'posts:profile', kwargs={'username': username})
+    if section == 'groups':
+        slug = Group.objects.filter(pk=pk).values_list(
+            'slug', flat=True).first()
+        return slug and reverse('posts:group_list', kwargs={'slug': slug})
+    raise ValueError(f'Unknown snapshot section {section!r}')
+
+
+MODELS = {'posts': Post, 'profiles': User, 'groups': Group}
+
+
+def snapshot_path(url):
+    return os.path.join(settings.SNAPSHOT_ROOT, url.lstrip('/'), INDEX)
+
+
+def write_snapshot(url, content):
+    """Пишет index.html и сжатую копию для gzip_static атомарно."""
+    path = snapshot_path(url)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    for name, data in ((INDEX, content),
+                       (INDEX + '.gz', compress(content, 'gzip', best=True))):
+        temp_path = os.path.join(directory, '.' + name)
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, os.path.join(directory, name))
+
+
+def remove_snapshot(url):
+    path = snapshot_path(url)
+    for name in (path + '.gz', path):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+    if url != '/':
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+class Publisher:
+    """Перерисовывает снимки страниц из очереди для анонимов.
+
+    Страница рисуется тем же кодом, что отвечает посетителям, через
+    тестовый клиент без сессии. В манифесте (SNAPSHOT_QUEUE_DIR)
+    записано, какой файл какому объекту принадлежит: снимки удалённых
+    объектов и старых адресов удаляются.
+    """
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST=settings.SNAPSHOT_HOST)
+        self.manifest_path = os.path.join(
+            settings.SNAPSHOT_QUEUE_DIR, MANIFEST)
+        try:
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def save(self):
+        os.makedirs(settings.SNAPSHOT_QUEUE_DIR, exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(self.manifest, file)
+        os.replace(temp_path, self.manifest_path)
+
+    def render(self, url):
+        # Изменения, сделанные воркерами только что, могут быть ещё не
+        # видны в кэшах этого процесса: LRU core.cache.TwoTierCache
+        # (версии страниц) и кэш групп.
+        clear_local = getattr(cache, 'clear_local', None)
+        if clear_local is not None:
+            clear_local()
+        group_cache.clear()
+        response = self.client.get(url)
+        if response.status_code != 200 or response.cookies:
+            # Ошибки, редиректы и ответы с куками не годятся всем.
+            return None
+        return response.content
+
+    def publish(self, section, pk):
+        key = f'{section}:{pk}'
+        url = url_for(section, pk)
+        content = url and self.render(url)
+        old_url = self.manifest.pop(key, None)
+        if content is not None:
+            write_snapshot(url, content)
+            self.manifest[key] = url
+        if old_url and old_url != self.manifest.get(key):
+            remove_snapshot(old_url)
+        return content is not None
+
+    def prune(self, section):
+        """Удаляет снимки объектов раздела, которых больше нет в БД."""
+        published = self.published(section)
+        alive = set(MODELS[section].objects.filter(
+            pk__in=published).values_list('pk', flat=True))
+        for pk in published:
+            if pk not in alive:
+                remove_snapshot(self.manifest.pop(f'{section}:{pk}'))
+
+    def published(self, section):
+        prefix = f'{section}:'
+        return [int(key[len(prefix):]) for key in self.manifest
+                if key.startswith(prefix)]
+
+    def process(self, section, pk):
+        if pk == 'all':
+            # Устарели все страницы раздела: удалённых объектов больше
+            # нет, остальные перерисовываются.
+            self.prune(section)
+            for object_pk in self.published(section):
+                self.publish(section, object_pk)
+        else:
+            self.publish(section, int(pk))
+        if section == 'profiles':
+            # На страницах постов выводятся имя автора и число его постов.
+            posts = Post.objects.filter(pk__in=self.published('posts'))
+            if pk != 'all':
+                posts = posts.filter(author_id=int(pk))
+            for post_pk in posts.values_list('pk', flat=True):
+                self.publish('posts', post_pk)
+
+    def drain(self, queue_dir=None):
+        """Обрабатывает очередь; возвращает число обработанных записей.
+
+        Запись удаляется до отрисовки, так что изменение во время
+        отрисовки поставит объект в очередь ещё раз.
+        """
+        queue_dir = queue_dir or settings.SNAPSHOT_QUEUE_DIR
+        paths = queued_paths(queue_dir)
+        try:
+            for path in paths:
+                section, _, pk = os.path.basename(path)[:-len(SUFFIX)] \
+                    .rpartition('-')
+                os.remove(path)
+                try:
+                    self.process(section, pk)
+                except Exception:
+                    logger.exception('Failed to publish snapshot %s:%s',
+                                     section, pk)
+                    open(path, 'w').close()
+        finally:
+            if paths:
+                self.save()
+        return len(paths)
+
+
+def enqueue_all():
+    """Ставит в очередь все страницы, например для первой публикации."""
+    enqueue('index', 0)
+    for section, model in MODELS.items():
+        enqueue(section, 'all')
+        for pk in model.objects.values_list('pk', flat=True).iterator():
+            enqueue(section, pk)
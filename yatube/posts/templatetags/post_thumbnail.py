@@ -0,0 +1,16 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post):
+    """{% post_thumbnail post as im %} -- миниатюра из thumbnails.attach.
+
+    Если view не подготовил миниатюру заранее, она ищется для одного поста.
+    """
+    if not hasattr(post, 'thumbnail'):
+        thumbnails.attach([post])
+    return post.thumbnail
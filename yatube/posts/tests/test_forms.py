@@ -148,9 +148,7 @@ class CommentFormTest(TestCase):
         self.assertRedirects(response, reverse(
             'posts:post_detail', kwargs={'post_id': self.post.id}))
         self.assertEqual(self.post.comments.count(), 1)
-        comment = self.authorized_client.get(reverse(
-            'posts:post_detail', kwargs={'post_id': self.post.id}))
-        first_object = comment.context['comments'][0]
+        first_object = response.context['comments'][0]
         self.assertEqual(first_object.text, 'Тестовый Комментарий')
         self.assertEqual(first_object.author, self.user)
 
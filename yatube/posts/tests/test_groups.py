@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..groups import get_group, group_cache
+from ..models import Group, GroupAuthorStats, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.empty_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        group_cache.clear()
+        self.guest_client = Client()
+
+    def test_stats_follow_post_changes(self):
+        """Агрегаты группы обновляются при создании, переносе и удалении"""
+        first = Post.objects.create(
+            author=self.user, text='Пост', group=self.group)
+        second = Post.objects.create(
+            author=self.other, text='Пост', group=self.group)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.last_post_at, second.pub_date)
+        second.group = self.empty_group
+        second.save()
+        stats.refresh_from_db()
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.last_post_at, first.pub_date)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.empty_group).post_count, 1)
+        first.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.post_count, 0)
+        self.assertIsNone(stats.last_post_at)
+        self.assertFalse(
+            GroupAuthorStats.objects.filter(group=self.group).exists())
+
+    def test_directory_lists_groups(self):
+        """Каталог показывает группы, число записей и авторов"""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        # Четвёртый запрос -- статистика таблицы для пагинатора.
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.group, self.empty_group])
+        self.assertContains(response, 'Записей: 1')
+        self.assertContains(response, self.user.username)
+
+    def test_directory_loads_only_top_authors(self):
+        """Каталог загружает только трёх самых активных авторов группы"""
+        for index in range(4):
+            author = User.objects.create_user(username=f'Author{index}')
+            for _ in range(index + 1):
+                Post.objects.create(
+                    author=author, text='Пост', group=self.group)
+        response = self.guest_client.get(reverse('posts:group_index'))
+        group = response.context['page_obj'][0]
+        self.assertEqual(
+            [stats.author.username for stats in group.author_stats.all()],
+            ['Author3', 'Author2', 'Author1'])
+        self.assertNotContains(response, 'Author0')
+
+    def test_group_cached_by_slug(self):
+        """Группа по slug берётся из кэша процесса до её изменения"""
+        get_group(self.group.slug)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group(self.group.slug), self.group)
+        self.group.title = 'Новое название'
+        self.group.save()
+        with self.assertNumQueries(1):
+            group = get_group(self.group.slug)
+        self.assertEqual(group.title, 'Новое название')
+
+    def test_group_page_cached(self):
+        """Страница группы берётся из кэша и сбрасывается при изменении"""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.guest_client.get(url), 'Новое название')
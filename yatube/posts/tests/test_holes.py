@@ -0,0 +1,100 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import compression
+
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class HolePunchedPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.author, text='Тест текст')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_page_shared_between_users(self):
+        """Страница строится один раз, шапка у каждого своя"""
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        response = self.author_client.get(url)
+        self.assertTemplateUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Пользователь: Author')
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Пользователь: Reader')
+        self.assertNotContains(response, 'Пользователь: Author')
+        self.assertContains(response, 'Подписаться')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'Пользователь:')
+        self.assertNotContains(response, 'Подписаться')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_follow_updates_user_fragment(self):
+        """После подписки кнопка меняется, хотя страница из кэша"""
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        self.assertContains(self.reader_client.get(url), 'Подписаться')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.reader_client.get(url), 'Отписаться')
+
+    def test_post_detail_user_parts(self):
+        """Форма комментария с CSRF и ссылка на правку -- только своим"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.author_client.get(url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(response, 'редактировать запись')
+        response = self.reader_client.get(url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, 'редактировать запись')
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_new_comment_invalidates_page(self):
+        """Новый комментарий сразу виден на закэшированной странице"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.guest_client.get(url)
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый комментарий'})
+        self.assertContains(self.guest_client.get(url), 'Новый комментарий')
+
+    def test_new_post_updates_author_count(self):
+        """Новый пост автора меняет число постов на страницах других"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertContains(self.guest_client.get(url),
+                            'Всего постов автора:  <span >1</span>')
+        Post.objects.create(author=self.author, text='Второй пост')
+        self.assertContains(self.guest_client.get(url),
+                            'Всего постов автора:  <span >2</span>')
+
+    def test_compressed_page_assembled_without_recompression(self):
+        """gzip-тело склеивается из сжатых кусков, страница не пережимается"""
+        url = reverse('posts:index')
+        self.author_client.get(url)
+        with mock.patch.object(compression, 'compress',
+                               wraps=compression.compress) as compress:
+            for client in (self.author_client, self.reader_client,
+                           self.guest_client):
+                response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(gzip.decompress(response.content),
+                                 client.get(url).content)
+        compress.assert_not_called()
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -27,3 +30,38 @@ class PostModelTest(TestCase):
         self.assertEqual(expected_group_name, str(self.group))
         expected_post_name = self.post.text[:15]
         self.assertEqual(expected_post_name, str(self.post))
+
+    def test_text_rendered_on_save(self):
+        """HTML и выдержка текста считаются при сохранении"""
+        post = Post.objects.create(
+            author=self.user, text='<b>Строка</b>\nвторая строка' * 3)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Ответ\nещё')
+        self.assertEqual(
+            post.text_html,
+            '&lt;b&gt;Строка&lt;/b&gt;<br>вторая строка&lt;b&gt;'
+            'Строка&lt;/b&gt;<br>вторая строка&lt;b&gt;Строка&lt;/b&gt;'
+            '<br>вторая строка',
+        )
+        self.assertEqual(len(post.excerpt), 30)
+        self.assertTrue(post.excerpt.endswith('…'))
+        self.assertEqual(comment.text_html, 'Ответ<br>ещё')
+        self.assertEqual(comment.excerpt, 'Ответ\nещё')
+
+    def test_render_texts_fills_missing_html(self):
+        """render_texts заполняет HTML записей, сохранённых без save()"""
+        Post.objects.filter(pk=self.post.pk).update(text_html='', excerpt='')
+        call_command('render_texts', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'Тест текст' * 10)
+        self.assertEqual(self.post.excerpt, self.post.text[:29] + '…')
+
+    def test_render_texts_fixes_stale_html(self):
+        """render_texts находит HTML, устаревший после update()"""
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        out = StringIO()
+        call_command('render_texts', stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'Новый текст')
+        self.assertEqual(self.post.excerpt, 'Новый текст')
+        self.assertIn('обновлено 1', out.getvalue())
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, GroupAuthorStats, GroupStats, Post
+from ..moderation import delete_images
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+small_gif = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B'
+             )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MODERATION_CHUNK_SIZE=2)
+class ModerationActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='Pass-1234')
+        cls.spammer = User.objects.create_user(username='Spammer')
+        cls.user = User.objects.create_user(username='Name')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(
+                author=self.spammer, text=f'Спам {i}', group=self.group)
+            for i in range(5)
+        ]
+        self.post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group)
+        Comment.objects.create(
+            post=self.spam[0], author=self.user, text='Коммент')
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам')
+
+    def run_action(self, action, posts, **data):
+        return self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def test_move_to_group_asks_for_group(self):
+        """Перенос сначала показывает форму выбора группы"""
+        response = self.run_action('move_to_group', self.spam)
+        self.assertTemplateUsed(
+            response, 'admin/posts/post/move_to_group.html')
+        self.assertEqual(response.context['count'], 5)
+
+    def test_move_to_group(self):
+        """Перенос меняет группу постов и пересчитывает агрегаты"""
+        guest_client = Client()
+        post_url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.spam[0].pk})
+        profile_url = reverse('posts:profile',
+                              kwargs={'username': self.spammer.username})
+        for url in (post_url, profile_url, reverse('posts:index')):
+            self.assertNotContains(guest_client.get(url), 'other-slug')
+        self.run_action('move_to_group', self.spam,
+                        group=self.other_group.pk, apply='1')
+        for url in (post_url, profile_url, reverse('posts:index')):
+            self.assertContains(guest_client.get(url), 'other-slug')
+        self.assertEqual(
+            Post.objects.filter(group=self.other_group).count(), 5)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.other_group).post_count, 5)
+        self.assertFalse(GroupAuthorStats.objects.filter(
+            group=self.group, author=self.spammer).exists())
+
+    def test_delete_spam(self):
+        """Удаление спама уносит посты с комментариями и агрегаты"""
+        self.run_action('delete_spam', self.spam)
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 1)
+
+    def test_purge_authors(self):
+        """Чистка удаляет посты и комментарии авторов выбранных постов"""
+        self.run_action('purge_authors', self.spam[:1])
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(
+            Comment.objects.filter(author=self.spammer).exists())
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_changelist_queries_do_not_grow(self):
+        """Список постов не делает запросов на каждую строку"""
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        for i in range(5):
+            Post.objects.create(author=self.user, text=f'Ещё {i}',
+                                group=self.other_group)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_delete_images(self):
+        """Картинки удалённых постов стираются из хранилища"""
+        post = Post.objects.create(
+            author=self.spammer,
+            text='Спам',
+            image=SimpleUploadedFile(
+                'spam.gif', small_gif, content_type='image/gif'),
+        )
+        self.assertTrue(default_storage.exists(post.image.name))
+        delete_images([post.image.name])
+        self.assertFalse(default_storage.exists(post.image.name))
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, Recommendation
+from ..recommendations import for_user, rebuild
+
+User = get_user_model()
+
+
+class RecommendationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.friend_of_friend = User.objects.create_user(username='fof')
+        cls.commenter = User.objects.create_user(username='commenter')
+        cls.group_mate = User.objects.create_user(username='group_mate')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+        post = Post.objects.create(author=cls.friend, text='Пост')
+        Comment.objects.create(post=post, author=cls.reader, text='Раз')
+        Comment.objects.create(post=post, author=cls.commenter, text='Два')
+        Post.objects.create(
+            author=cls.reader, text='Пост', group=cls.group)
+        Post.objects.create(
+            author=cls.group_mate, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        rebuild(top=10)
+
+    def test_candidates_from_all_signals(self):
+        """Кандидаты из подписок друзей, комментариев и групп"""
+        recommended = [rec.author for rec in for_user(self.reader)]
+        self.assertEqual(
+            recommended,
+            [self.friend_of_friend, self.commenter, self.group_mate],
+        )
+
+    def test_followed_and_self_excluded(self):
+        """Уже отслеживаемые авторы и сам пользователь не предлагаются"""
+        authors = Recommendation.objects.filter(
+            user=self.reader).values_list('author', flat=True)
+        self.assertNotIn(self.friend.pk, authors)
+        self.assertNotIn(self.reader.pk, authors)
+
+    def test_rebuild_replaces_previous(self):
+        """Повторный пересчёт не дублирует записи"""
+        count = Recommendation.objects.count()
+        rebuild(top=10)
+        self.assertEqual(Recommendation.objects.count(), count)
+
+    def test_served_with_single_query(self):
+        """Рекомендации читаются одним запросом"""
+        with self.assertNumQueries(1):
+            [rec.author.username for rec in for_user(self.reader)]
+
+    def test_shown_on_follow_index(self):
+        """Рекомендации показываются в ленте подписок"""
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Возможно, вам будут интересны')
+        self.assertContains(response, self.friend_of_friend.username)
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_CHUNK_SIZE=2)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тест текст {i}',
+                group=cls.group,
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_chunk(self, section, chunk):
+        return self.guest_client.get(
+            reverse('posts:sitemap_section', kwargs={'section': section}),
+            {'p': chunk},
+        )
+
+    def test_index_lists_all_chunks(self):
+        """Индекс карты содержит все куски каждого раздела"""
+        response = self.guest_client.get(reverse('posts:sitemap_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'sitemap-posts.xml?p=3')
+        self.assertNotContains(response, 'sitemap-posts.xml?p=4')
+        self.assertContains(response, 'sitemap-groups.xml')
+        self.assertContains(response, 'sitemap-profiles.xml')
+
+    def test_chunk_contains_posts(self):
+        """Кусок карты содержит ссылки на свои посты"""
+        response = self.get_chunk('posts', 1)
+        self.assertContains(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}))
+        self.assertNotContains(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[2].pk}))
+
+    def test_unknown_section_and_chunk(self):
+        """Неизвестный раздел, пустой и неканонический кусок -- 404"""
+        self.assertEqual(self.get_chunk('unknown', 1).status_code, 404)
+        self.assertEqual(self.get_chunk('posts', 10).status_code, 404)
+        self.assertEqual(self.get_chunk('posts', 'x').status_code, 404)
+        self.assertEqual(self.get_chunk('posts', '01').status_code, 404)
+        self.assertEqual(self.get_chunk('posts', '²').status_code, 404)
+
+    def test_only_changed_chunk_is_regenerated(self):
+        """Комментарий сбрасывает кэш только куска своего поста"""
+        self.get_chunk('posts', 1)
+        self.get_chunk('posts', 2)
+        Comment.objects.create(
+            post=self.posts[3], author=self.user, text='Коммент')
+        with self.assertNumQueries(0):
+            self.get_chunk('posts', 1)
+        with self.assertNumQueries(2):
+            self.get_chunk('posts', 2)
+
+    def test_lastmod_uses_latest_comment(self):
+        """lastmod поста учитывает последний комментарий"""
+        comment = Comment.objects.create(
+            post=self.posts[0], author=self.user, text='Коммент')
+        response = self.get_chunk('posts', 1)
+        self.assertContains(
+            response, comment.created.date().isoformat())
@@ -0,0 +1,185 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from .. import moderation, pages, snapshots
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_SNAPSHOT_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_QUEUE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'snapshots_test',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 60},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'snapshots_shared_test',
+    },
+}
+
+
+@override_settings(SNAPSHOT_ROOT=TEMP_SNAPSHOT_ROOT,
+                   SNAPSHOT_QUEUE_DIR=TEMP_QUEUE_DIR)
+class SnapshotPublisherTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SNAPSHOT_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_QUEUE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        # Внутри TestCase транзакция не коммитится, очередь пишем сразу.
+        patcher = mock.patch.object(snapshots.transaction, 'on_commit',
+                                    lambda func: func())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, path):
+        with open(os.path.join(TEMP_SNAPSHOT_ROOT, path,
+                               'index.html')) as file:
+            return file.read()
+
+    def exists(self, path):
+        return os.path.exists(
+            os.path.join(TEMP_SNAPSHOT_ROOT, path, 'index.html'))
+
+    def test_new_post_publishes_affected_pages(self):
+        """Новый пост перерисовывает свою страницу, автора, группу и главную"""
+        post = Post.objects.create(author=self.user, text='Снимок поста',
+                                   group=self.group)
+        snapshots.Publisher().drain()
+        for path in (f'posts/{post.pk}', 'profile/Author', 'group/test-slug',
+                     ''):
+            self.assertIn('Снимок поста', self.read(path))
+        self.assertNotIn('<!--hole:', self.read(''))
+        with gzip.open(os.path.join(TEMP_SNAPSHOT_ROOT, 'index.html.gz'),
+                       'rt') as file:
+            self.assertEqual(file.read(), self.read(''))
+        self.assertEqual(snapshots.queued_paths(TEMP_QUEUE_DIR), [])
+
+    def test_deleted_post_snapshot_removed(self):
+        """Снимок удалённого поста удаляется"""
+        post = Post.objects.create(author=self.user, text='Удалить')
+        snapshots.Publisher().drain()
+        self.assertTrue(self.exists(f'posts/{post.pk}'))
+        path = f'posts/{post.pk}'
+        post.delete()
+        snapshots.Publisher().drain()
+        self.assertFalse(self.exists(path))
+        self.assertNotIn('Удалить', self.read(''))
+
+    def test_deleted_post_keeps_other_posts(self):
+        """Удаление поста не перерисовывает страницы остальных постов"""
+        post = Post.objects.create(author=self.user, text='Удалить')
+        other = Post.objects.create(author=self.user, text='Оставить')
+        snapshots.Publisher().drain()
+        version = pages.versions(('posts', other.pk))
+        pk = post.pk
+        post.delete()
+        self.assertEqual(pages.versions(('posts', other.pk)), version)
+        self.assertEqual(
+            [os.path.basename(path)
+             for path in snapshots.queued_paths(TEMP_QUEUE_DIR)],
+            ['index-0.todo', f'posts-{pk}.todo',
+             f'profiles-{self.user.pk}.todo'])
+
+    def test_author_change_republishes_posts(self):
+        """Смена имени автора перерисовывает снимки его постов"""
+        writer = User.objects.create_user(username='Writer')
+        post = Post.objects.create(author=writer, text='Пост автора')
+        snapshots.Publisher().drain()
+        writer.username = 'Renamed'
+        writer.save()
+        snapshots.Publisher().drain()
+        self.assertIn('/profile/Renamed/', self.read(f'posts/{post.pk}'))
+
+    def test_renamed_group_moves_snapshot(self):
+        """После смены slug снимок по старому адресу удаляется"""
+        snapshots.enqueue('groups', self.group.pk)
+        snapshots.Publisher().drain()
+        self.assertTrue(self.exists('group/test-slug'))
+        self.group.slug = 'new-slug'
+        self.group.save()
+        snapshots.Publisher().drain()
+        self.assertFalse(self.exists('group/test-slug'))
+        self.assertTrue(self.exists('group/new-slug'))
+
+    def test_bulk_delete_refreshes_group_and_profile(self):
+        """Пакетное удаление перерисовывает страницы групп и авторов"""
+        spammer = User.objects.create_user(username='Spammer')
+        spam = Post.objects.create(author=spammer, text='Спам в группе',
+                                   group=self.group)
+        Post.objects.create(author=spammer, text='Обычный пост')
+        snapshots.Publisher().drain()
+        self.assertIn('Спам в группе', self.read('group/test-slug'))
+        moderation.delete_posts(Post.objects.filter(pk=spam.pk))
+        snapshots.Publisher().drain()
+        self.assertNotIn('Спам в группе', self.read('group/test-slug'))
+        self.assertNotIn('Спам в группе', self.read('profile/Spammer'))
+        self.assertIn('Обычный пост', self.read('profile/Spammer'))
+
+    def test_section_reset_republishes_pages(self):
+        """Сброс всего раздела перерисовывает оставшиеся снимки"""
+        snapshots.enqueue('groups', self.group.pk)
+        snapshots.Publisher().drain()
+        Group.objects.filter(pk=self.group.pk).update(title='Тихо')
+        pages.touch_all('groups')
+        snapshots.Publisher().drain()
+        self.assertIn('Тихо', self.read('group/test-slug'))
+
+    def test_comment_keeps_index(self):
+        """Комментарий не сбрасывает главную"""
+        post = Post.objects.create(author=self.user, text='Пост')
+        snapshots.Publisher().drain()
+        version = pages.versions(('index', 0))
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        self.assertEqual(pages.versions(('index', 0)), version)
+        self.assertEqual(
+            [os.path.basename(path)
+             for path in snapshots.queued_paths(TEMP_QUEUE_DIR)],
+            [f'posts-{post.pk}.todo'])
+
+    @override_settings(CACHES=TWO_TIER_CACHES)
+    def test_publisher_reads_shared_versions(self):
+        """Версии страниц читаются из общего кэша, а не из LRU процесса"""
+        snapshots.enqueue('groups', self.group.pk)
+        publisher = snapshots.Publisher()
+        publisher.drain()
+        # Другой воркер меняет группу и версию её страниц.
+        Group.objects.filter(pk=self.group.pk).update(title='Другой воркер')
+        caches['shared'].set(
+            pages.PAGE_VERSION_KEY.format(section='groups',
+                                          pk=self.group.pk),
+            'new', timeout=None)
+        snapshots.enqueue('groups', self.group.pk)
+        publisher.drain()
+        self.assertIn('Другой воркер', self.read('group/test-slug'))
+
+    @override_settings(SNAPSHOT_ROOT=None)
+    def test_disabled_without_root(self):
+        """Без SNAPSHOT_ROOT очередь не пополняется"""
+        Post.objects.create(author=self.user, text='Без снимков')
+        self.assertEqual(snapshots.queued_paths(TEMP_QUEUE_DIR), [])
@@ -0,0 +1,248 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail.models import KVStore
+from sorl.thumbnail.parsers import parse_geometry
+
+from .. import pages
+from ..management.commands import optimize_media
+from ..models import Group, Post
+from ..thumbnail_engine import Engine
+from ..thumbnails import attach, thumbnail_key
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+small_gif = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B'
+             )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailResolverTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                image=SimpleUploadedFile(
+                    f'small{i}.gif', small_gif, content_type='image/gif'),
+            )
+            for i in range(3)
+        ]
+        cls.plain = Post.objects.create(author=cls.user, text='Без картинки')
+        for post in cls.posts:
+            KVStore.objects.create(
+                key=thumbnail_key(post.image),
+                value=json.dumps({
+                    'name': f'cache/{post.pk}.gif',
+                    'storage': 'django.core.files.storage.FileSystemStorage',
+                    'size': [960, 339],
+                }),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_resolved_in_one_query(self):
+        """Миниатюры страницы читаются одним запросом, потом из кэша"""
+        posts = list(Post.objects.filter(pk__in=[
+            post.pk for post in self.posts + [self.plain]]))
+        with self.assertNumQueries(1):
+            attach(posts)
+        for post in posts:
+            with self.subTest(post=post.pk):
+                if post.image:
+                    self.assertEqual(post.thumbnail.name,
+                                     f'cache/{post.pk}.gif')
+                    self.assertEqual(post.thumbnail.size, [960, 339])
+                else:
+                    self.assertIsNone(post.thumbnail)
+        with self.assertNumQueries(0):
+            attach(posts)
+
+    def test_tag_uses_resolved_thumbnail(self):
+        """Тег берёт миниатюру, подготовленную во view"""
+        post = self.posts[0]
+        post.thumbnail = 'prepared'
+        template = Template(
+            '{% load post_thumbnail %}{% post_thumbnail post as im %}{{ im }}')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                template.render(Context({'post': post})), 'prepared')
+
+    def test_image_info_saved_on_upload(self):
+        """Размеры, цвет и превью картинки сохраняются при загрузке"""
+        post = self.posts[0]
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertRegex(post.image_color, r'^#[0-9a-f]{6}$')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertIsNone(self.plain.image_width)
+
+    def test_describe_images_fills_missing_info(self):
+        """describe_images заполняет данные картинок старых постов"""
+        Post.objects.update(image_width=None, image_color='')
+        call_command('describe_images', workers=1, stdout=StringIO())
+        post = Post.objects.get(pk=self.posts[1].pk)
+        self.assertEqual(post.image_width, 2)
+        self.assertEqual(post.image_color, self.posts[1].image_color)
+
+    def test_image_has_dimensions_and_placeholder(self):
+        """Картинка выводится с размерами, фоном-превью и ленивой загрузкой"""
+        post = Post.objects.get(pk=self.posts[0].pk)
+        attach([post])
+        html = render_to_string(
+            'posts/includes/post_image.html', {'post': post, 'lazy': 1})
+        self.assertIn('width="960" height="339"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn(post.image_color, html)
+        html = render_to_string(
+            'posts/includes/post_image.html', {'post': post, 'lazy': 0})
+        self.assertNotIn('loading="lazy"', html)
+
+    def test_optimize_media_shrinks_large_images(self):
+        """optimize_media уменьшает большие картинки и не трогает готовые"""
+        buffer = BytesIO()
+        Image.effect_noise((400, 200), 60).convert('RGB').save(
+            buffer, 'JPEG', quality=100)
+        post = Post.objects.create(
+            author=self.user,
+            text='Большая картинка',
+            image=SimpleUploadedFile('big.jpg', buffer.getvalue(),
+                                     content_type='image/jpeg'),
+        )
+        old_name = post.image.name
+        state = os.path.join(TEMP_MEDIA_ROOT, 'state.json')
+        with self.settings(MEDIA_OPTIMIZE_MAX_SIZE=100):
+            call_command('optimize_media', workers=1, state=state,
+                         stdout=StringIO())
+            post.refresh_from_db()
+            self.assertNotEqual(post.image.name, old_name)
+            self.assertEqual((post.image_width, post.image_height),
+                             (100, 50))
+            self.assertLess(post.image.size, len(buffer.getvalue()))
+            out = StringIO()
+            call_command('optimize_media', workers=1, state=state,
+                         stdout=out)
+        self.assertIn('пережато картинок 0', out.getvalue())
+        post.refresh_from_db()
+        self.assertTrue(default_storage.exists(post.image.name))
+
+    def big_post(self, name, **fields):
+        buffer = BytesIO()
+        Image.effect_noise((400, 200), 60).convert('RGB').save(
+            buffer, 'JPEG', quality=100)
+        return Post.objects.create(
+            author=self.user,
+            text='Большая картинка',
+            image=SimpleUploadedFile(name, buffer.getvalue(),
+                                     content_type='image/jpeg'),
+            **fields,
+        )
+
+    def test_optimize_media_refreshes_pages(self):
+        """После подмены картинки сбрасываются страницы автора и группы"""
+        group = Group.objects.create(title='Группа', slug='optimize')
+        post = self.big_post('big.jpg', group=group)
+        objects = (('posts', post.pk), ('profiles', self.user.pk),
+                   ('groups', group.pk))
+        before = pages.versions(*objects)
+        state = os.path.join(TEMP_MEDIA_ROOT, 'state.json')
+        with self.settings(MEDIA_OPTIMIZE_MAX_SIZE=100):
+            call_command('optimize_media', workers=1, state=state,
+                         restart=True, stdout=StringIO())
+        after = pages.versions(*objects)
+        for index in (1, 3, 5):
+            self.assertNotEqual(before[index], after[index])
+
+    def test_optimize_media_skips_broken_images(self):
+        """Картинка, на которой падает PIL, не прерывает проход"""
+        bomb = self.big_post('bomb.jpg')
+        post = self.big_post('big.jpg')
+        names = bomb.image.name, post.image.name
+        optimize = optimize_media.optimize
+
+        def explode(path, *args):
+            if 'bomb' in os.path.basename(path):
+                raise Image.DecompressionBombError(path)
+            return optimize(path, *args)
+
+        state = os.path.join(TEMP_MEDIA_ROOT, 'state.json')
+        with self.settings(MEDIA_OPTIMIZE_MAX_SIZE=100), \
+                mock.patch.object(optimize_media, 'optimize', explode):
+            call_command('optimize_media', workers=1, state=state,
+                         restart=True, stdout=StringIO())
+        bomb.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual(bomb.image.name, names[0])
+        self.assertNotEqual(post.image.name, names[1])
+
+
+def camera_jpeg(size=(2000, 1000)):
+    buffer = BytesIO()
+    Image.new('RGB', size, '#336699').save(buffer, 'JPEG')
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+class ThumbnailEngineTest(SimpleTestCase):
+    options = {
+        'crop': 'center', 'upscale': True, 'cropbox': None,
+        'orientation': True, 'colorspace': 'RGB', 'format': 'JPEG',
+        'quality': 95, 'padding': False, 'rounded': None, 'blur': None,
+    }
+
+    def create(self, image):
+        geometry = parse_geometry('960x339', image.width / image.height)
+        return Engine().create(image, geometry, self.options)
+
+    def test_jpeg_decoded_at_reduced_scale(self):
+        """Большой JPEG декодируется в уменьшенном, но достаточном масштабе"""
+        image = camera_jpeg()
+        Engine().draft(image, parse_geometry('960x339', 2), self.options)
+        self.assertEqual(image.size, (1000, 500))
+        self.assertEqual(self.create(camera_jpeg()).size, (960, 339))
+
+    def test_small_image_not_drafted(self):
+        """Картинку меньше миниатюры draft не трогает, её увеличивают"""
+        image = camera_jpeg((480, 360))
+        thumbnail = self.create(image)
+        self.assertEqual(thumbnail.size, (960, 339))
+
+    def test_raw_data_buffer_reused_safely(self):
+        """Повторная запись в общий буфер не портит прошлые миниатюры"""
+        engine = Engine()
+        big = engine._get_raw_data(
+            self.create(camera_jpeg()), 'JPEG', 95, image_info={})
+        small = engine._get_raw_data(
+            Image.new('RGB', (10, 10)), 'JPEG', 95, image_info={})
+        self.assertEqual(Image.open(BytesIO(big)).size, (960, 339))
+        self.assertEqual(Image.open(BytesIO(small)).size, (10, 10))
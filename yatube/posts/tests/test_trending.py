@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post
+from ..trending import add_scores, event_score
+
+User = get_user_model()
+
+
+class TrendingScoreTest(TestCase):
+    def test_score_decays_with_half_life(self):
+        """Событие на период полураспада старше весит вдвое меньше"""
+        now = timezone.now()
+        older = event_score(now - timedelta(hours=6))
+        self.assertAlmostEqual(event_score(now) - older, 0.6931, places=3)
+
+    def test_add_scores(self):
+        """Сложение счетов в логарифмической шкале"""
+        self.assertAlmostEqual(add_scores(0.0, 0.0), 0.6931, places=3)
+        self.assertEqual(add_scores(1e6, 0.0), 1e6)
+
+
+class TrendingViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+        cls.discussed = Post.objects.create(author=cls.user, text='Старый')
+        cls.fresh = Post.objects.create(author=cls.user, text='Новый')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_comments_raise_post(self):
+        """Пост с комментариями поднимается выше более нового"""
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.fresh)
+        for _ in range(3):
+            Comment.objects.create(
+                post=self.discussed, author=self.user, text='Коммент')
+        cache.clear()
+        response = self.guest_client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.discussed)
+
+    def test_comment_updates_only_its_post(self):
+        """Комментарий меняет счёт только своего поста"""
+        score = Post.objects.get(pk=self.fresh.pk).trending_score
+        Comment.objects.create(
+            post=self.discussed, author=self.user, text='Коммент')
+        self.assertEqual(
+            Post.objects.get(pk=self.fresh.pk).trending_score, score)
+
+    def test_switcher_has_trending_tab(self):
+        """Вкладка популярного есть на главной"""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:trending'))
@@ -114,6 +114,20 @@ class PostsPagesTest(TestCase):
         expected_post = self.post
         self.assert_info(post, expected_post)
 
+    def test_feeds_defer_raw_text(self):
+        """Ленты выводят готовый HTML и не читают исходный текст"""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertIn('text', post.get_deferred_fields())
+                self.assertContains(response, self.post.text_html)
+
     def test_post_create_show_correct_context(self):
         """Шаблон post_create сформирован с правильным контекстом"""
         response = self.authorized_client.get(reverse('posts:post_create'))
@@ -0,0 +1,71 @@
+import math
+import threading
+from io import BytesIO
+
+from PIL import Image, ImageFile
+from sorl.thumbnail.engines import pil_engine
+
+# Уменьшение, начиная с которого LANCZOS сначала грубо сжимает
+# картинку Image.reduce и только потом сглаживает.
+REDUCING_GAP = 3.0
+
+_local = threading.local()
+
+
+class Engine(pil_engine.Engine):
+    """PIL-движок sorl-thumbnail, не декодирующий лишних пикселей.
+
+    JPEG открывается в режиме draft: libjpeg сразу отдаёт картинку,
+    уменьшенную в 2, 4 или 8 раз, но не меньше нужной миниатюры.
+    Фильтр выбирается по степени уменьшения, а буфер для записи
+    миниатюры переиспользуется в пределах потока.
+    """
+
+    def create(self, image, geometry, options):
+        if image.format == 'JPEG' and not options['cropbox']:
+            self.draft(image, geometry, options)
+        return super().create(image, geometry, options)
+
+    def draft(self, image, geometry, options):
+        x_image, y_image = image.size
+        if self.flip_dimensions(image, options=options):
+            x_image, y_image = y_image, x_image
+        factor = self._calculate_scaling_factor(
+            x_image, y_image, geometry, options)
+        if factor < 1:
+            image.draft(image.mode, (math.ceil(image.size[0] * factor),
+                                     math.ceil(image.size[1] * factor)))
+
+    def _scale(self, image, width, height):
+        ratio = max(image.width / width, image.height / height)
+        if ratio < 1:
+            return image.resize((width, height), resample=Image.BICUBIC)
+        return image.resize(
+            (width, height),
+            resample=Image.LANCZOS,
+            reducing_gap=REDUCING_GAP if ratio >= REDUCING_GAP else None,
+        )
+
+    def _get_raw_data(self, image, format_, quality, image_info=None,
+                      progressive=False):
+        ImageFile.MAXBLOCK = max(
+            ImageFile.MAXBLOCK, image.size[0] * image.size[1])
+        buffer = getattr(_local, 'buffer', None)
+        if buffer is None:
+            buffer = _local.buffer = BytesIO()
+        params = {'format': format_, 'quality': quality, 'optimize': 1}
+        if image_info and 'icc_profile' in image_info:
+            params['icc_profile'] = image_info['icc_profile']
+        if format_ == 'JPEG' and progressive:
+            params['progressive'] = True
+        buffer.seek(0)
+        buffer.truncate()
+        try:
+            image.save(buffer, **params)
+        except OSError:
+            # Без оптимизации, как и в исходном движке.
+            buffer.seek(0)
+            buffer.truncate()
+            params.pop('optimize')
+            image.save(buffer, **params)
+        return buffer.getvalue()
@@ -0,0 +1,91 @@
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+logger = logging.getLogger(__name__)
+
+# Миниатюра, которую показывают ленты и страница поста.
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def thumbnail_options(source):
+    """Опции с умолчаниями, как их дополняет ThumbnailBackend.get_thumbnail.
+
+    От них зависит имя файла миниатюры, поэтому порядок и набор
+    должны совпадать с sorl-thumbnail.
+    """
+    options = dict(OPTIONS)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', default.backend._get_format(source))
+    for key, value in default.backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in default.backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_key(image):
+    """Ключ миниатюры в хранилище sorl, вычисленный без обращений к нему."""
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, GEOMETRY, thumbnail_options(source))
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def fetch_serialized(keys):
+    """Сериализованные миниатюры: один get_many и не больше одного запроса."""
+    kv_cache = getattr(default.kvstore, 'cache', None)
+    if not keys or kv_cache is None:
+        return {}
+    found = {
+        key: value for key, value in kv_cache.get_many(keys).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(KVStore.objects.filter(key__in=missing)
+                      .values_list('key', 'value'))
+        if stored:
+            kv_cache.set_many(stored, settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(stored)
+    return found
+
+
+def attach(posts):
+    """Проставляет post.thumbnail всем постам страницы.
+
+    Готовые миниатюры читаются пачкой; отсутствующие строятся
+    обычным get_thumbnail. У постов без картинки thumbnail -- None.
+    """
+    posts = list(posts)
+    keys = {
+        post.pk: thumbnail_key(post.image) for post in posts if post.image
+    }
+    serialized = fetch_serialized(list(keys.values()))
+    for post in posts:
+        if not post.image:
+            post.thumbnail = None
+        elif keys[post.pk] in serialized:
+            post.thumbnail = deserialize_image_file(serialized[keys[post.pk]])
+        else:
+            post.thumbnail = build_thumbnail(post.image)
+    return posts
+
+
+def build_thumbnail(image):
+    """get_thumbnail с обработкой ошибок, как в теге {% thumbnail %}."""
+    try:
+        return get_thumbnail(image, GEOMETRY, **OPTIONS)
+    except Exception:
+        if settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Failed to build thumbnail for %s', image)
+        return None
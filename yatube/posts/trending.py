@@ -0,0 +1,46 @@
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE.total_seconds()
+
+
+def event_score(when, weight=1.0):
+    """Логарифм веса события, приведённого к EPOCH.
+
+    Вместо того чтобы уменьшать счёт всех постов со временем, каждое
+    новое событие весит в e^(rate * dt) раз больше старых. Порядок
+    постов при этом тот же, что у счёта с экспоненциальным затуханием,
+    но пересчитывать нужно только пост, к которому пришло событие.
+    """
+    return (when - EPOCH).total_seconds() * decay_rate() + math.log(weight)
+
+
+def add_scores(first, second):
+    """log(e^first + e^second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def initial_score(post):
+    return event_score(post.pub_date, settings.TRENDING_POST_WEIGHT)
+
+
+def bump(post_id, when, weight=1.0):
+    with transaction.atomic():
+        score = (Post.objects.select_for_update()
+                 .filter(pk=post_id)
+                 .values_list('trending_score', flat=True)
+                 .first())
+        if score is None:
+            return
+        Post.objects.filter(pk=post_id).update(
+            trending_score=add_scores(score, event_score(when, weight)))
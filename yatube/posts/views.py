@@ -1,34 +1,81 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.contrib.sitemaps import views as sitemap_views
+from django.core.cache import cache
+from django.db.models import F
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import cache_page
 
+from core.cache import cache_view
+from core.paginator import EstimatedCountPaginator
+from core.ratelimit import ratelimit
+
 from .forms import CommentForm, PostForm
+from . import pages, recommendations, thumbnails
+from .groups import get_group, top_authors
 from .models import Follow, Group, Post
+from .sitemaps import chunk_version, sitemaps
 
 User = get_user_model()
 
 
-@cache_page(60 * 20)
+@cache_view(60 * 20, stale_timeout=60, holes=True,
+            vary_on=lambda request: pages.versions(('index', 0)))
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
+    post_list = Post.objects.defer('text')
+    paginator = EstimatedCountPaginator(post_list, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    thumbnails.attach(page_obj)
     context = {
         'page_obj': page_obj,
         'paginator': paginator,
+        # Фрагмент ленты тоже сбрасывается при изменении постов.
+        'page_version': pages.versions(('index', 0))[-1],
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_view(60, holes=True)
+def trending(request):
+    post_list = Post.objects.defer('text').order_by('-trending_score')
+    paginator = EstimatedCountPaginator(post_list, 10)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    thumbnails.attach(page_obj)
+    context = {
+        'page_obj': page_obj,
+        'paginator': paginator,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    groups = (
+        Group.objects
+        .select_related('stats')
+        .prefetch_related(top_authors())
+        .order_by(F('stats__last_post_at').desc(nulls_last=True), 'title')
+    )
+    paginator = EstimatedCountPaginator(groups, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@cache_view(60 * 10, holes=True, vary_on=lambda request, slug: (
+    pages.versions(('groups', get_group(slug).pk))))
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
+    group = get_group(slug)
+    posts = group.posts.defer('text')
+    paginator = EstimatedCountPaginator(posts, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    thumbnails.attach(page_obj)
     context = {
         'group': group,
         'posts': posts,
@@ -37,31 +84,43 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def profile_versions(request, username):
+    user_id = (User.objects.filter(username=username)
+               .values_list('pk', flat=True).first())
+    return pages.versions(('profiles', user_id))
+
+
+@cache_view(60 * 10, holes=True, vary_on=profile_versions)
 def profile(request, username):
     profile = get_object_or_404(User, username=username)
-    user_posts = profile.posts.all()
-    posts_count = user_posts.count()
-    paginator = Paginator(user_posts, 10)
+    user_posts = profile.posts.defer('text')
+    paginator = EstimatedCountPaginator(user_posts, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    following = (request.user.is_authenticated and profile != request.user
-                 and Follow.objects.filter(user=request.user,
-                                           author=profile).exists())
+    thumbnails.attach(page_obj)
+    posts_count = paginator.count
     context = {
         'profile': profile,
         'user_posts': user_posts,
         'posts_count': posts_count,
         'page_obj': page_obj,
-        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def post_versions(request, post_id):
+    # На странице поста выводятся имя автора и число его постов.
+    author_id = (Post.objects.filter(pk=post_id)
+                 .values_list('author_id', flat=True).first())
+    return pages.versions(('posts', post_id), ('profiles', author_id))
+
+
+@cache_view(60 * 10, holes=True, vary_on=post_versions)
 def post_detail(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     user_posts = post.author.posts.all()
     posts_count = user_posts.count()
-    post_title = post.text[:30]
+    post_title = post.excerpt
     form = CommentForm()
     comments = post.comments.all()
     context = {
@@ -76,6 +135,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@ratelimit('post_create', '10/m')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -111,6 +171,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment', '20/m')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -124,18 +185,22 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
+    post_list = (Post.objects.defer('text')
+                 .filter(author__following__user=request.user))
+    paginator = EstimatedCountPaginator(post_list, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    thumbnails.attach(page_obj)
     context = {
         'paginator': paginator,
         'page_obj': page_obj,
+        'recommendations': recommendations.for_user(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('profile_follow', '30/m', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
@@ -151,3 +216,33 @@ def profile_unfollow(request, username):
     get_object_or_404(Follow, user=request.user,
                       author__username=username).delete()
     return redirect('posts:profile', username=username)
+
+
+@cache_page(60 * 60)
+def sitemap_index(request):
+    return sitemap_views.index(
+        request,
+        sitemaps,
+        sitemap_url_name='posts:sitemap_section',
+    )
+
+
+def sitemap_section(request, section):
+    if section not in sitemaps:
+        raise Http404
+    chunk = request.GET.get('p', '1')
+    # Только каноническая запись номера: у '01' был бы свой ключ кэша,
+    # который touch_chunk не сбрасывает.
+    if not chunk.isdecimal() or chunk != str(int(chunk)):
+        raise Http404
+    key = 'sitemap:{}:{}:{}:{}'.format(
+        request.get_host(), section, chunk, chunk_version(section, chunk)
+    )
+    content = cache.get(key)
+    if content is None:
+        response = sitemap_views.sitemap(request, sitemaps, section=section)
+        content = response.render().content
+        cache.set(key, content, timeout=None)
+    response = HttpResponse(content, content_type='application/xml')
+    response['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    return response
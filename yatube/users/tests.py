@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import queued_paths
+
+from .backends import CachedModelBackend
+
+User = get_user_model()
+
+
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Name')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_user_read_from_cache(self):
+        """Повторное получение пользователя не обращается к БД"""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+
+    def test_cache_invalidated_on_save(self):
+        """Сохранение пользователя сбрасывает кэш"""
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_authenticated_request_skips_session_and_user_queries(self):
+        """Авторизованный запрос не читает сессию и пользователя из БД"""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertContains(response, self.user.username)
+
+    def test_session_of_model_backend_still_valid(self):
+        """Сессия, открытая через ModelBackend, не сбрасывается"""
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = client.get(reverse('about:author'))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+
+class PasswordResetQueueTest(TestCase):
+    def setUp(self):
+        self.queue_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.queue_dir, ignore_errors=True)
+        User.objects.create_user(
+            username='Name', email='name@yatube.ru', password='Pass-1234')
+
+    def test_reset_email_is_queued(self):
+        """Письмо сброса пароля ставится в очередь, а не отправляется"""
+        with override_settings(EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+                               EMAIL_QUEUE_DIR=self.queue_dir):
+            response = self.client.post(
+                reverse('users:password_reset_form'),
+                {'email': 'name@yatube.ru'},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(queued_paths(self.queue_dir)), 1)
@@ -0,0 +1,22 @@
+"""
+Settings entry point: loads the profile named by YATUBE_ENV.
+
+    dev  - local development, DEBUG on (default);
+    test - fast hashers and in-memory backends for the test suite;
+    prod - DEBUG off, cached templates, persistent connections.
+
+A profile module can also be used directly, e.g.
+DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+_profile = os.environ.get('YATUBE_ENV', 'dev')
+
+if _profile == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif _profile == 'test':
+    from .test import *  # noqa: F401,F403
+elif _profile == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(f'Unknown YATUBE_ENV profile: {_profile!r}')
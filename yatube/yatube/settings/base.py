@@ -0,0 +1,365 @@
+"""
+Django settings for yatube project, shared by every profile.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+Profiles (dev, test, prod) live next to this module and are selected
+with the YATUBE_ENV environment variable, see yatube/settings/__init__.py.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+YATUBE_ENV = os.environ.get('YATUBE_ENV', 'dev')
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'h!^6r6=&=-jmd1p4mqg3v9@n)l-unjm1=_^31y%)0&$z=$q2_$'
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = env_bool('DEBUG', False)
+
+ALLOWED_HOSTS = env_list(
+    'ALLOWED_HOSTS', ['127.0.0.1', 'localhost', 'testserver']
+)
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'core.apps.CoreConfig',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.sitemaps',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.compression.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year_context.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': env_int('CONN_MAX_AGE', 0),
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation'
+        '.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.'
+        'NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_URL = '/static/'
+# Сюда collectstatic собирает статику, а core.staticfiles отдаёт её
+# из процесса. Имена с хэшем кэшируются навсегда, остальные -- на
+# STATIC_MAX_AGE секунд.
+STATIC_ROOT = os.environ.get(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static'))
+STATIC_MAX_AGE = 60 * 60
+
+# Фрагменты пользователя на общих страницах ({% hole %}, core.holes)
+# кэшируются на столько секунд.
+HOLE_TIMEOUT = 60 * 5
+
+# Ответы короче этого не сжимаются (core.compression): заголовки
+# и накладные расходы gzip съедают выигрыш.
+COMPRESSION_MIN_LENGTH = 512
+
+
+# Сессии, открытые до появления CachedModelBackend, ссылаются на
+# ModelBackend: без него в списке все пользователи разлогинились бы.
+# Убрать через релиз, когда такие сессии истекут.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+USER_CACHE_TIMEOUT = env_int('USER_CACHE_TIMEOUT', 300)
+
+# cached_db читает сессию из кэша и идёт в БД только при промахе;
+# signed_cookies не обращается к серверу вовсе.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get(
+    'SESSION_BACKEND', 'cached_db'
+)
+
+# Частота запросов на запись, см. core.ratelimit; None отключает лимит.
+RATELIMITS = {}
+# Адреса фронтовых прокси: для запросов с них адрес клиента берётся из
+# X-Forwarded-For (например, RATELIMIT_TRUSTED_PROXIES=127.0.0.1).
+RATELIMIT_TRUSTED_PROXIES = env_list('RATELIMIT_TRUSTED_PROXIES', [])
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+# LOGOUT_REDIRECT_URL = 'posts:index'
+
+
+# Письма кладутся в очередь и отправляются командой send_queued_mail
+# через EMAIL_QUEUE_BACKEND, одним соединением на пачку.
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_QUEUE_DIR = os.environ.get(
+    'EMAIL_QUEUE_DIR', os.path.join(BASE_DIR, 'mail_queue')
+)
+EMAIL_QUEUE_BACKEND = os.environ.get(
+    'EMAIL_QUEUE_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = env_int('EMAIL_PORT', 25)
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# MEDIA_URL отдаёт core.media.serve: после проверки доступа файл
+# передаётся фронтовому серверу ('nginx' -- X-Accel-Redirect на
+# internal location MEDIA_ACCEL_PREFIX, 'apache' -- X-Sendfile), а без
+# MEDIA_ACCEL отдаётся самим Django. Отдаются только перечисленные
+# каталоги; значение -- необязательная проверка пути.
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_DIRECTORIES = {
+    'posts/': 'posts.images.is_published',
+    'cache/': None,
+}
+# Оригиналы могут смениться под тем же именем, миниатюры -- нет.
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# JPEG декодируется сразу в уменьшенном масштабе (posts.thumbnail_engine).
+THUMBNAIL_ENGINE = 'posts.thumbnail_engine.Engine'
+
+# locmem держит отдельную копию кэша в каждом воркере; file и memcached
+# общие для всех воркеров хоста. CACHE_TWO_TIER=1 ставит перед общим
+# кэшем маленький LRU процесса (core.cache.TwoTierCache).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': env_int('CACHE_MAX_ENTRIES', 1000),
+        },
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': env_int('CACHE_MAX_ENTRIES', 1000),
+        },
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+
+if env_bool('CACHE_TWO_TIER'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': 'default',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'LOCAL_MAX_ENTRIES': env_int('CACHE_LOCAL_MAX_ENTRIES', 256),
+                'LOCAL_TIMEOUT': env_int('CACHE_LOCAL_TIMEOUT', 5),
+            },
+        },
+        'shared': CACHE_BACKENDS[CACHE_BACKEND],
+    }
+else:
+    CACHES = {
+        'default': CACHE_BACKENDS[CACHE_BACKEND],
+    }
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django.db.backends': {
+            'level': os.environ.get('DB_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+SITEMAP_CHUNK_SIZE = 1000
+
+# Сколько рекомендаций хранить на пользователя (build_recommendations).
+RECOMMENDATIONS_TOP = 10
+
+# Популярное: вклад комментария вдвое меньше через TRENDING_HALF_LIFE,
+# сам пост стартует с весом TRENDING_POST_WEIGHT комментариев.
+TRENDING_HALF_LIFE = timedelta(hours=6)
+TRENDING_POST_WEIGHT = 1.0
+
+# Кэш групп по slug в памяти процесса (posts.groups.get_group).
+GROUP_CACHE_SIZE = 256
+GROUP_CACHE_TIMEOUT = 60
+
+# Выше этого числа строк пагинаторы берут оценку из статистики СУБД
+# или закэшированный COUNT(*) (core.paginator.EstimatedCountPaginator).
+ESTIMATED_COUNT_THRESHOLD = 10000
+PAGINATOR_COUNT_TIMEOUT = 60 * 5
+
+# Пакетные действия модерации обрабатывают посты кусками такого размера.
+MODERATION_CHUNK_SIZE = 500
+
+# optimize_media пережимает картинки постов больше этого потолка
+# (по большей стороне или по размеру файла) и помнит, где остановилась.
+MEDIA_OPTIMIZE_MAX_SIZE = env_int('MEDIA_OPTIMIZE_MAX_SIZE', 1920)
+MEDIA_OPTIMIZE_MAX_BYTES = env_int('MEDIA_OPTIMIZE_MAX_BYTES', 1024 * 1024)
+MEDIA_OPTIMIZE_QUALITY = 85
+MEDIA_OPTIMIZE_STATE = os.environ.get(
+    'MEDIA_OPTIMIZE_STATE', os.path.join(BASE_DIR, 'optimize_media.json'))
+
+# Снимки страниц для анонимов (posts.snapshots): publish_snapshots пишет
+# готовый HTML в SNAPSHOT_ROOT, откуда его отдаёт фронтовой сервер.
+# Без SNAPSHOT_ROOT снимки не публикуются.
+SNAPSHOT_ROOT = os.environ.get('SNAPSHOT_ROOT')
+SNAPSHOT_QUEUE_DIR = os.environ.get(
+    'SNAPSHOT_QUEUE_DIR', os.path.join(BASE_DIR, 'snapshot_queue'))
+# Хост, под которым страницы рисуются: от него зависят абсолютные ссылки.
+SNAPSHOT_HOST = os.environ.get('SNAPSHOT_HOST', ALLOWED_HOSTS[0])
+
+# Выборочное профилирование (core.profiling): с PROFILING=1 доля
+# PROFILING_RATE запросов и запросы сотрудников с заголовком X-Profile
+# снимаются статистическим профилировщиком раз в PROFILING_INTERVAL
+# секунд. Стеки складываются в PROFILING_DIR по именам view, не больше
+# PROFILING_MAX_FILES на каждую; читать -- командой profile_report.
+PROFILING = env_bool('PROFILING')
+PROFILING_RATE = float(os.environ.get('PROFILING_RATE', 0.01))
+PROFILING_HEADER = 'HTTP_X_PROFILE'
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.environ.get(
+    'PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = env_int('PROFILING_MAX_FILES', 100)
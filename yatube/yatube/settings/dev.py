@@ -0,0 +1,6 @@
+from .base import *  # noqa: F401,F403
+from .base import env_bool
+
+YATUBE_ENV = 'dev'
+
+DEBUG = env_bool('DEBUG', True)
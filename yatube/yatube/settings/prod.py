@@ -0,0 +1,49 @@
+import os
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import (CACHES, DATABASES, LOGGING, TEMPLATES, env_bool,
+                   env_int)
+
+YATUBE_ENV = 'prod'
+
+# Ключ из base.py лежит в репозитории; в продакшене он только из окружения.
+try:
+    SECRET_KEY = os.environ['SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set SECRET_KEY for the prod profile.')
+
+# Без DEBUG Django не копит connection.queries и не держит
+# отладочные данные шаблонов в памяти воркера.
+DEBUG = env_bool('DEBUG', False)
+
+DATABASES = deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = env_int('CONN_MAX_AGE', 600)
+
+CACHES = deepcopy(CACHES)
+for config in CACHES.values():
+    if 'MAX_ENTRIES' in config.get('OPTIONS', {}):
+        config['OPTIONS']['MAX_ENTRIES'] = env_int(
+            'CACHE_MAX_ENTRIES', 10000
+        )
+
+# Шаблоны разбираются один раз на процесс и дальше берутся из памяти.
+TEMPLATES = deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Имена с хэшем содержимого и сжатые копии .gz/.br для каждого файла.
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
+LOGGING = deepcopy(LOGGING)
+LOGGING['root']['level'] = os.environ.get('LOG_LEVEL', 'WARNING')
+LOGGING['loggers']['django.db.backends']['level'] = os.environ.get(
+    'DB_LOG_LEVEL', 'WARNING'
+)
@@ -0,0 +1,23 @@
+from copy import deepcopy
+
+from .base import *  # noqa: F401,F403
+from .base import LOGGING
+
+YATUBE_ENV = 'test'
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+RATELIMITS = {
+    'post_create': None,
+    'add_comment': None,
+    'profile_follow': None,
+    'signup': None,
+}
+
+# Прогресс пакетных операций и прогрева не нужен в выводе тестов.
+LOGGING = deepcopy(LOGGING)
+LOGGING['root']['level'] = 'WARNING'